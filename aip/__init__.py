@@ -0,0 +1 @@
+"""Shared building blocks for the Additive Prompt Generator apps."""
@@ -0,0 +1,462 @@
+"""Streamlit app shared by every generator.
+
+Each app script only picks a generator::
+
+    from aip.app import run_app
+    from aip.generators import PHOTO
+
+    run_app(PHOTO)
+
+Streamlit reruns the script on every widget change, so this module only
+imports what draws the page. The langchain/OpenAI stack takes most of the
+start-up time and is imported the first time "Generate" needs it.
+"""
+import logging
+import os
+import time
+from dataclasses import asdict
+
+import streamlit as st
+
+from aip.backends import DEFAULT_CREATIVE_BACKEND, DEFAULT_FORMATTING_BACKEND, requires_api_key
+from aip.fused import PROMPTS_TITLE, RowParseError, format_line, parse_rows, parse_table, render_lines, split_lines
+from aip.generators import GENERATORS
+from aip.history import ResultStore, backend_label, export_runs
+from aip.offline import enumerate_rows, polish_lines, sample_rows
+from aip.schema import ASPECT_RATIO_OPTIONS, CUSTOM_OPTION, Generator
+from aip.validate import render_prompts
+
+CLASSIC_MODE = "Classic (two calls)"
+FUSED_MODE = "Fused (single call)"
+SHARDED_MODE = "Sharded (parallel calls)"
+OFFLINE_MODE = "Offline (no API call)"
+REGENERATE_MODE = "Regenerate rows"
+HISTORY_LIMIT = 50
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+
+logger = logging.getLogger(__name__)
+
+
+# Persistent table/line response cache shared by every session
+@st.cache_resource(show_spinner=False)
+def load_response_cache():
+    from aip.cache import SQLiteLRUCache
+
+    return SQLiteLRUCache()
+
+
+# Near-identical inputs reuse an earlier generated set, shared by every session
+@st.cache_resource(show_spinner=False)
+def load_semantic_cache():
+    from aip.semantic import SemanticCache
+
+    return SemanticCache()
+
+
+# Every generated set is appended to the local history database
+@st.cache_resource(show_spinner=False)
+def load_result_store():
+    return ResultStore()
+
+
+# Prometheus endpoint, started once per process when AIP_METRICS_PORT is set
+@st.cache_resource(show_spinner=False)
+def load_metrics_server(port):
+    from aip.metrics import start_metrics_server
+
+    return start_metrics_server(port)
+
+
+# Initialize the LLMs and chains once per API key. Streamlit reruns the app
+# on every widget change, so the cached chains (and the HTTP clients behind
+# them) are reused across reruns and sessions instead of being rebuilt.
+# The LLMs make a single attempt per call; the app retries through aip.retry
+# so that the retries show up in the metrics.
+@st.cache_resource(ttl=60 * 60, max_entries=32, show_spinner=False)
+def load_chains(api_key, use_cache, streaming, generator_name):
+    from aip.chains import build_chains
+
+    chains = build_chains(api_key, GENERATORS[generator_name],
+                          cache=use_cache, streaming=streaming, max_retries=1)
+    logger.debug("Built chains for %s: %s", generator_name, chains)
+    return chains
+
+
+def field_input(container, label, options):
+    """Selectbox over ``options`` plus a free-text input when "Custom" is picked."""
+    value = container.selectbox(label, [*options, CUSTOM_OPTION], index=0)
+    if value == CUSTOM_OPTION:
+        value = container.text_input(f"Enter custom {label.lower()}")
+    return value
+
+
+def new_result(generator, inputs, rows, lines):
+    """Session-state record of a generated set, kept as rows when they are known."""
+    prompts = split_lines(lines)
+    if rows is not None and len(prompts) != len(rows):
+        # LLM-written lines that can not be matched to the rows are formatted locally
+        prompts = [format_line(row, inputs["framework"], inputs["aspect_ratio"]) for row in rows]
+    for key in [key for key in st.session_state if key.startswith(("lock_", "regenerate_"))]:
+        del st.session_state[key]
+    return {"generator": generator.name, "inputs": inputs, "rows": rows, "prompts": prompts, "lines": lines}
+
+
+def mode_model(mode, polish=False):
+    """The models a generation mode calls, as stored in the history."""
+    if mode == OFFLINE_MODE:
+        return backend_label(DEFAULT_FORMATTING_BACKEND) if polish else ""
+    if mode == CLASSIC_MODE:
+        return backend_label(DEFAULT_CREATIVE_BACKEND, DEFAULT_FORMATTING_BACKEND)
+    return backend_label(DEFAULT_CREATIVE_BACKEND)
+
+
+def run_app(generator: Generator) -> None:
+    st.set_page_config(
+        page_icon=":camera:",
+        layout="centered",
+    )
+
+    st.title(generator.title)
+    st.markdown(
+        "#### This app will generate copy & paste prompt variations for Midjourney.")
+
+    col1, col2, col3 = st.sidebar.columns([1, 1, 2])
+    col1.image(os.path.join(STATIC_DIR, "plus.png"), width=75)
+    col2.image(os.path.join(STATIC_DIR, "camera-with-flash.png"), width=75)
+    col3.write("")
+    with st.sidebar.expander("How this app works"):
+        st.markdown('''
+            - Each of the input fields will be used as a variable in the first LLM call prompt.
+            - The prompt will be used to generate a table that breaks down the image into its elements.
+            - The table will be filled with the user specified number of rows of data with variations created by LLM.
+            - The table output from the first LLM call will be used as a variable input for the second LLM call prompt.
+            - The second call will generate a comma-separated summary sentence for each row of the table.
+            - The sentences will be prepended with {framework} and appended with —ar {aspect_ratio}.
+            - The sentences will be formatted as a bulleted markdown list and displayed for the user.
+            '''
+                    )
+
+    API_O = st.sidebar.text_input(":blue[Enter Your OPENAI API-KEY :]",
+                                  placeholder="Paste your OpenAI API key here (sk-...)", type="password")
+    use_cache = st.sidebar.checkbox("Reuse cached responses", value=True,
+                                    help="Identical or nearly identical inputs return the stored result instantly "
+                                         "instead of calling OpenAI again.")
+    stream = st.sidebar.checkbox("Stream output", value=True,
+                                 help="Show the table rows and prompts as the tokens arrive instead of waiting for the full result.")
+    debug = st.sidebar.checkbox("Show debug panel", value=False,
+                                help="Stage timings, token counts, cache hits and retries of the last request.")
+
+    if os.environ.get("AIP_METRICS_PORT"):
+        load_metrics_server(int(os.environ["AIP_METRICS_PORT"]))
+
+    # Local and fake backends (AIP_CREATIVE_BACKEND / AIP_FORMATTING_BACKEND) need no key
+    llm_ready = bool(API_O) or not requires_api_key()
+    if not llm_ready:
+        st.markdown('''
+        ```
+        Start Here:
+            - 1. Enter your OpenAI API key to use this app 🔐
+            - 2. Select a suggestion or add a custom suggestion 📝
+            - 3. Select the number of prompt variations to generate 🔢
+            - 4. Click the "Generate Prompts" button to generate prompts 🚀
+        ''')
+        st.sidebar.warning(
+            'API key is required to try this app. The API key is not stored.')
+
+    # Create two columns and add the input fields to them
+    panels = st.columns(2)
+    values = {}
+    if generator.framework_options:
+        values["framework"] = field_input(panels[0], "Framework", generator.framework_options)
+    for field in generator.fields:
+        values[field.name] = field_input(panels[field.panel], field.label, field.options)
+    values["aspect_ratio"] = field_input(panels[1], "Aspect Ratio", ASPECT_RATIO_OPTIONS)
+
+    mode = st.radio("Generation mode", [CLASSIC_MODE, FUSED_MODE, SHARDED_MODE, OFFLINE_MODE], horizontal=True,
+                    help="Fused mode asks for the table rows as JSON in one call and formats the prompts locally. "
+                         "Sharded mode splits large row counts into parallel fused calls and merges the results. "
+                         "Offline mode combines the listed options locally without calling the LLM.")
+    polish = False
+    if mode == OFFLINE_MODE:
+        labels = {field.label: field.name for field in generator.fields}
+        vary = [labels[label] for label in st.multiselect(
+            "Vary", list(labels), default=list(labels),
+            help="Fields that change between prompts. The other fields keep the selected value.")]
+        offline_col1, offline_col2 = st.columns(2)
+        seed = offline_col1.number_input("Seed", min_value=0, value=0, step=1)
+        enumerate_combinations = offline_col2.checkbox(
+            "Enumerate combinations in order", help="List combinations in option order instead of sampling them.")
+        polish = offline_col2.checkbox("Polish with LLM", disabled=not llm_ready,
+                                       help="Rewrite the combined prompts into fluent sentences, 20 prompts per LLM call.")
+
+    values["row_numbers"] = st.slider(
+        "Number of Prompts", 1, 200 if mode in (SHARDED_MODE, OFFLINE_MODE) else 10, 5)
+
+    st.sidebar.markdown('''
+    ---
+    :camera: This application is build on the **Additive Prompting** ideas of [@nickfloats](https://twitter.com/nickfloats)
+
+    :robot_face: Application created by [@Kirby_](https://twitter.com/Kirby_) & GPT-4
+
+    :bird::link: Utilizing [@LangChainAI](https://twitter.com/LangChainAI)
+
+    :point_right: The code for this app is available on [GitHub](https://github.com/jaredkirby)
+
+    ---
+    Built by **Jared Kirby** :wave:
+
+    [Twitter](https://twitter.com/Kirby_) | [GitHub](https://github.com/jaredkirby) | [LinkedIn](https://www.linkedin.com/in/jared-kirby/) | [Portfolio](https://www.jaredkirby.me)
+
+        '''
+                        )
+
+    needs_llm = mode != OFFLINE_MODE or polish
+    if st.button("Generate", disabled=needs_llm and not llm_ready):
+        try:
+            inputs = generator.validate_inputs(values)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        framework, aspect_ratio = inputs["framework"], inputs["aspect_ratio"]
+        import langchain
+
+        from aip.budget import ContextOverflowError
+        from aip.metrics import MetricsHandler
+        from aip.repair import repair_lines, repair_rows, repair_table
+        from aip.retry import RETRIES, chain_call
+        from aip.semantic import cache_inputs, dedupe_rows, dedupe_table
+        from aip.shards import generate_sharded
+        from aip.streaming import stream_chain
+
+        langchain.llm_cache = load_response_cache()
+        if needs_llm:
+            chains = load_chains(API_O, use_cache, stream, generator.name)
+        handler = MetricsHandler(mode)
+        callbacks = [handler]
+        retry = {"retries": RETRIES, "on_retry": handler.record_retry}
+        call = chain_call(callbacks, **retry)
+        semantic_key = cache_inputs(generator, mode, inputs) if use_cache and mode != OFFLINE_MODE else None
+        semantic_hit = load_semantic_cache().lookup(*semantic_key) if semantic_key else None
+        table = None
+        repairs = []
+        with st.spinner("Generating output..."):
+            output_box = st.empty()
+            if semantic_hit is not None:
+                similarity, cached = semantic_hit
+                rows, lines = cached["rows"], cached["lines"]
+                handler.record_cache_hit()
+                st.caption(f"Reused the result of nearly identical inputs (similarity {similarity:.2f}).")
+            elif mode == OFFLINE_MODE:
+                if enumerate_combinations:
+                    rows = enumerate_rows(generator, inputs, vary, inputs["row_numbers"])
+                else:
+                    rows = sample_rows(generator, inputs, vary, inputs["row_numbers"], seed=int(seed))
+                lines = render_lines(rows, framework, aspect_ratio)
+                if polish:
+                    try:
+                        lines, unpolished = polish_lines(lines, lambda chunk, count: stream_chain(
+                            chains.polish, {**inputs, "lines": chunk, "row_numbers": count},
+                            output_box if stream else None, callbacks=callbacks, **retry))
+                    except Exception as e:
+                        st.warning(f"Could not polish the prompts, showing them as built: {e}")
+                    else:
+                        if unpolished:
+                            st.caption(f"{unpolished} prompts could not be polished and are shown as built.")
+            elif mode == SHARDED_MODE:
+                try:
+                    rows = generate_sharded(chains.rows, inputs, generator.columns, inputs["row_numbers"],
+                                            call=call)
+                except RowParseError as e:
+                    st.error(f"Could not generate the rows: {e}")
+                    st.stop()
+                lines = render_lines(rows, framework, aspect_ratio)
+            elif mode == FUSED_MODE:
+                try:
+                    output = stream_chain(chains.rows, inputs, output_box if stream else None, code=True,
+                                          callbacks=callbacks, **retry)
+                    rows = dedupe_rows(parse_rows(output, generator.columns))
+                except ContextOverflowError as e:
+                    st.error(str(e))
+                    st.stop()
+                except RowParseError as e:
+                    st.error(f"Could not read the generated rows: {e}")
+                    st.code(output)
+                    st.stop()
+                rows, repairs = repair_rows(chains.rows, inputs, generator.columns, rows, call=call)
+                lines = render_lines(rows, framework, aspect_ratio)
+            else:
+                table_box = st.expander("Table", expanded=True).empty() if stream else None
+                try:
+                    # Near-duplicate rows are dropped before the line prompt is written for them
+                    table = dedupe_table(stream_chain(chains.table, inputs, table_box, callbacks=callbacks, **retry),
+                                         generator.columns)
+                    # A short or cut-off table is completed before the line prompt sees it
+                    table, repairs = repair_table(chains, generator, inputs, table, call=call)
+                    lines = stream_chain(chains.line, {**inputs, "table": table}, output_box if stream else None,
+                                         callbacks=callbacks, **retry)
+                except ContextOverflowError as e:
+                    st.error(str(e))
+                    st.stop()
+                try:
+                    rows = parse_table(table, generator.columns)
+                except RowParseError:
+                    rows = None
+                if rows:
+                    lines, line_repairs = repair_lines(chains, generator, inputs, rows, lines, call=call)
+                    repairs += line_repairs
+            handler.record_repairs(repairs)
+            metrics = handler.finish()
+            if semantic_key and semantic_hit is None:
+                load_semantic_cache().update(*semantic_key, {"rows": rows, "lines": lines})
+
+            output_box.empty()
+            logger.debug("Generated prompts:\n%s", lines)
+
+        if repairs:
+            st.caption(f"Repaired the model output: {'; '.join(repairs)}.")
+        st.session_state["result"] = new_result(generator, inputs, rows, lines)
+        load_result_store().record(generator.name, mode, inputs, lines, table=table, rows=rows, metrics=metrics,
+                                   model=mode_model(mode, polish))
+        # Keep the last run of each mode so their latency and token use can be compared
+        st.session_state.setdefault("generation_stats", {})[mode] = metrics
+        st.session_state["last_metrics"] = metrics
+
+    result = st.session_state.get("result")
+    if result is not None and result["generator"] == generator.name:
+        if result["rows"] is None:
+            st.markdown(result["lines"])
+        else:
+            show_rows(generator, result, API_O, llm_ready, use_cache, stream)
+
+    for stats_mode, metrics in st.session_state.get("generation_stats", {}).items():
+        st.caption(
+            f"{stats_mode}: {metrics.elapsed:.1f}s, {metrics.prompt_tokens} prompt + "
+            f"{metrics.completion_tokens} completion tokens, {metrics.cache_hits} cache hits")
+
+    show_history(generator)
+
+    # Both need the LLM stack, which is only loaded once something was generated
+    if "last_metrics" in st.session_state:
+        from aip.metrics import REGISTRY
+
+        if debug:
+            with st.expander("Debug", expanded=True):
+                st.json(asdict(st.session_state["last_metrics"]))
+                st.code(REGISTRY.render())
+
+        cache_stats = load_response_cache().stats()
+        st.sidebar.caption(
+            f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['entries']} stored)")
+
+
+def show_rows(generator, result, api_key, llm_ready, use_cache, stream):
+    """The prompts with per-row "Lock" and regenerate controls.
+
+    Only the rows picked for regeneration go back to the LLM, in parallel chunks.
+    The other rows, and their rendered prompts, are kept as they are.
+    """
+    rows, prompts, inputs = result["rows"], result["prompts"], result["inputs"]
+    locked = [st.session_state.get(f"lock_{i}", False) for i in range(len(rows))]
+    # Button clicks are in the session state before the buttons are drawn again
+    if st.session_state.get("regenerate_unlocked"):
+        indices = [i for i, is_locked in enumerate(locked) if not is_locked]
+    else:
+        indices = [i for i in range(len(rows)) if st.session_state.get(f"regenerate_{i}") and not locked[i]]
+
+    if indices and llm_ready:
+        import langchain
+
+        from aip.metrics import MetricsHandler
+        from aip.regenerate import regenerate_rows
+        from aip.retry import RETRIES, chain_call
+
+        langchain.llm_cache = load_response_cache()
+        chains = load_chains(api_key, use_cache, stream, generator.name)
+        handler = MetricsHandler(REGENERATE_MODE)
+        with st.spinner(f"Regenerating {len(indices)} of {len(rows)} rows..."):
+            try:
+                new_rows = regenerate_rows(chains.rows, inputs, generator.columns, rows, indices,
+                                           call=chain_call([handler], RETRIES, on_retry=handler.record_retry))
+            except RowParseError as e:
+                st.error(f"Could not read the regenerated rows: {e}")
+                new_rows = rows
+            except Exception as e:
+                st.error(f"Could not regenerate the rows: {e}")
+                new_rows = rows
+        for i in indices:
+            if new_rows[i] is not rows[i]:
+                prompts[i] = format_line(new_rows[i], inputs["framework"], inputs["aspect_ratio"])
+        result["rows"] = new_rows
+        result["lines"] = render_prompts(prompts)
+        metrics = handler.finish()
+        st.session_state.setdefault("generation_stats", {})[REGENERATE_MODE] = metrics
+        st.session_state["last_metrics"] = metrics
+        load_result_store().record(generator.name, REGENERATE_MODE, inputs, result["lines"], rows=new_rows,
+                                   metrics=metrics, model=mode_model(REGENERATE_MODE))
+
+    st.markdown(f"### {PROMPTS_TITLE}")
+    for i, prompt in enumerate(prompts):
+        text_col, lock_col, regenerate_col = st.columns([10, 2, 1])
+        text_col.markdown(f"- {prompt}")
+        is_locked = lock_col.checkbox("Lock", key=f"lock_{i}")
+        regenerate_col.button("🔄", key=f"regenerate_{i}", disabled=is_locked or not llm_ready,
+                              help="Regenerate this row")
+    st.button("Regenerate unlocked rows", key="regenerate_unlocked", disabled=not llm_ready or all(locked))
+    st.code("\n".join(prompts), language=None)
+
+
+def load_run(generator, run):
+    st.session_state["result"] = new_result(generator, run["inputs"], run["rows"], run["lines"])
+
+
+def show_history(generator):
+    """Past sets of this generator from the history database, with CSV/JSONL export."""
+    store = load_result_store()
+    with st.expander("History"):
+        labels = {field.label: field.name for field in generator.fields}
+        filter_col, value_col, mode_col = st.columns(3)
+        label = filter_col.selectbox("Filter by", ["Any field", *labels], key="history_field")
+        where = {}
+        if label != "Any field":
+            counts = dict(store.values(labels[label], generator.name))
+            value = value_col.selectbox("Value", list(counts), key="history_value",
+                                        format_func=lambda v: f"{v} ({counts[v]})")
+            if value is not None:
+                where[labels[label]] = value
+        mode = mode_col.selectbox("Mode", ["Any mode", CLASSIC_MODE, FUSED_MODE, SHARDED_MODE, OFFLINE_MODE,
+                                           REGENERATE_MODE], key="history_mode")
+        mode = None if mode == "Any mode" else mode
+
+        runs = store.query(generator.name, mode, where, limit=HISTORY_LIMIT)
+        if not runs:
+            st.caption("No stored runs match.")
+            return
+        by_id = {run["id"]: run for run in runs}
+        run_id = st.selectbox(
+            f"Runs (newest {len(runs)})", list(by_id), key="history_run",
+            format_func=lambda i: (f"#{i} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(by_id[i]['created']))} · "
+                                   f"{by_id[i]['mode']} · {len(split_lines(by_id[i]['lines']))} prompts"))
+        run = by_id[run_id]
+        st.markdown(run["lines"])
+        st.caption(f"{run['model'] or 'no model'}, {run['elapsed'] or 0:.1f}s")
+        st.button("Load these prompts", key="history_load", on_click=load_run, args=(generator, run),
+                  help="Show this set above to lock or regenerate its rows.")
+
+        # All matching runs are read and serialized only when an export is asked for, not on every rerun
+        format_col, prepare_col = st.columns(2)
+        export_format = format_col.radio("Export format", ["CSV", "JSONL"], key="history_format",
+                                         horizontal=True).lower()
+        export_key = (generator.name, mode, tuple(sorted(where.items())), export_format)
+        if prepare_col.button("Prepare export", key="history_prepare"):
+            matching = store.query(generator.name, mode, where, limit=None)
+            st.session_state["history_export"] = (export_key, len(matching), export_runs(matching, export_format))
+        prepared = st.session_state.get("history_export")
+        if prepared and prepared[0] == export_key:
+            _, count, text = prepared
+            st.download_button(f"Download {count} runs as {export_format.upper()}", text,
+                               file_name=f"{generator.name}-history.{export_format}",
+                               mime="text/csv" if export_format == "csv" else "application/jsonl",
+                               key="history_download")
+
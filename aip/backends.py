@@ -0,0 +1,89 @@
+"""Pick the LLM backend of each chain stage.
+
+A backend is named by a short spec:
+
+- ``openai`` or ``openai:<model>``: the OpenAI completions API
+- ``llamacpp:<path to .gguf>``: a local llama.cpp model on the CPU
+- ``fake``: the deterministic :class:`aip.llms.FakeLLM`
+
+The creative stages (table and fused rows) default to OpenAI at temperature
+0.7. The formatting stages (prompt lines and polish) only rewrite what the
+creative stage produced, so they run at temperature 0 and can be sent to a
+cheaper or faster backend with ``AIP_FORMATTING_BACKEND``.
+"""
+import os
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_OPENAI_MODEL = "text-davinci-003"
+DEFAULT_CREATIVE_BACKEND = os.environ.get("AIP_CREATIVE_BACKEND", "openai")
+DEFAULT_FORMATTING_BACKEND = os.environ.get("AIP_FORMATTING_BACKEND", "openai")
+LLAMA_N_CTX = int(os.environ.get("AIP_LLAMA_N_CTX", "2048"))
+
+BACKENDS = ("openai", "llamacpp", "fake")
+# Which role each chain stage plays, and the temperature of each role
+STAGE_ROLES = {"table": "creative", "rows": "creative", "line": "formatting", "polish": "formatting"}
+ROLE_TEMPERATURES = {"creative": 0.7, "formatting": 0.0}
+
+
+def parse_backend(spec: str) -> Tuple[str, str]:
+    """Split a backend spec into its kind and argument (model name or path)."""
+    kind, _, argument = spec.partition(":")
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend {spec!r}, expected one of: {', '.join(BACKENDS)}")
+    if kind == "llamacpp" and not argument:
+        raise ValueError("The llamacpp backend needs a model path: llamacpp:/path/to/model.gguf")
+    return kind, argument
+
+
+def requires_api_key(*specs: str) -> bool:
+    """Whether any of the backends (by default the configured ones) calls OpenAI."""
+    specs = specs or (DEFAULT_CREATIVE_BACKEND, DEFAULT_FORMATTING_BACKEND)
+    return any(parse_backend(spec)[0] == "openai" for spec in specs)
+
+
+def make_llm(spec: str, temperature: float, api_key: Optional[str] = None, cache: Optional[bool] = None,
+             streaming: bool = False, **llm_kwargs: Any) -> Any:
+    """Create the langchain LLM for ``spec``.
+
+    ``llm_kwargs`` (``max_retries``, ``openai_api_base``, ...) only apply to
+    the OpenAI backend.
+    """
+    kind, argument = parse_backend(spec)
+    if kind == "fake":
+        from aip.llms import FakeLLM
+
+        return FakeLLM(cache=cache, streaming=streaming)
+    if kind == "llamacpp":
+        from aip.llms import LocalLlamaCpp
+
+        return LocalLlamaCpp(model_path=argument, temperature=temperature, max_tokens=1000, n_ctx=LLAMA_N_CTX,
+                             cache=cache, streaming=streaming)
+    from langchain.llms import OpenAI
+
+    return OpenAI(model_name=argument or DEFAULT_OPENAI_MODEL, temperature=temperature,
+                  openai_api_key=api_key, max_tokens=1000, cache=cache, streaming=streaming, **llm_kwargs)
+
+
+class Router:
+    """The LLM of every chain stage, shared between stages with the same backend and role."""
+
+    def __init__(self, api_key: Optional[str] = None, creative: Optional[str] = None,
+                 formatting: Optional[str] = None, cache: Optional[bool] = None, streaming: bool = False,
+                 **llm_kwargs: Any) -> None:
+        self.backends = {"creative": creative or DEFAULT_CREATIVE_BACKEND,
+                         "formatting": formatting or DEFAULT_FORMATTING_BACKEND}
+        for spec in self.backends.values():
+            parse_backend(spec)
+        self.api_key = api_key
+        self.cache = cache
+        self.streaming = streaming
+        self.llm_kwargs = llm_kwargs
+        self._llms: Dict[Tuple[str, float], Any] = {}
+
+    def llm(self, stage: str) -> Any:
+        role = STAGE_ROLES[stage]
+        key = (self.backends[role], ROLE_TEMPERATURES[role])
+        if key not in self._llms:
+            self._llms[key] = make_llm(*key, api_key=self.api_key, cache=self.cache,
+                                       streaming=self.streaming, **self.llm_kwargs)
+        return self._llms[key]
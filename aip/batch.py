@@ -0,0 +1,216 @@
+"""Headless batch generation for many input combinations at once.
+
+Reads a CSV or JSONL file of input-variable dicts and runs the table -> line
+pipeline (or the fused single-call pipeline) for every record concurrently,
+writing one JSON line per record to the output file as soon as it finishes::
+
+    python -m aip.batch photo combinations.csv -o results.jsonl --concurrency 8 --rate 2
+"""
+import argparse
+import asyncio
+import csv
+import functools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import langchain
+from langchain.chains import LLMChain
+
+from aip.backends import DEFAULT_CREATIVE_BACKEND, DEFAULT_FORMATTING_BACKEND, requires_api_key
+from aip.cache import DEFAULT_CACHE_PATH, SQLiteLRUCache
+from aip.chains import Chains, build_chains
+from aip.fused import RowParseError, parse_rows, parse_table, render_lines
+from aip.generators import GENERATORS
+from aip.history import DEFAULT_HISTORY_PATH, ResultStore, backend_label
+from aip.metrics import MetricsHandler
+from aip.repair import arepair_lines, arepair_rows, arepair_table
+from aip.retry import BACKOFF, RETRIES, acall_chain
+from aip.schema import Generator
+from aip.semantic import dedupe_rows, dedupe_table
+
+
+class TokenBucket:
+    """Async token bucket allowing ``rate`` upstream calls per second.
+
+    Up to ``capacity`` calls may burst at once. A rate of 0 disables limiting.
+    The lock is created on the first :meth:`acquire`, inside the event loop
+    that uses it (before Python 3.10 a lock binds to the loop current when it
+    is created).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def read_inputs(path: str) -> List[Dict[str, Any]]:
+    """Load input-variable dicts from a ``.csv`` file or a JSON-lines file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            return [dict(row) for row in csv.DictReader(f)]
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class BatchRunner:
+    """Run the generation pipeline for many records with bounded concurrency."""
+
+    def __init__(self, chains: Chains, columns: Sequence[str], concurrency: int = 4,
+                 rate: float = 0.0, retries: int = RETRIES, backoff: float = BACKOFF,
+                 fused: bool = False, history: Optional[ResultStore] = None,
+                 generator: Optional[Generator] = None, model: str = "") -> None:
+        self.chains = chains
+        self.columns = columns
+        self.fused = fused
+        # With the generator, malformed output is repaired (aip.repair) and
+        # successful records are appended to the history database
+        self.generator = generator
+        self.history = history
+        self.model = model
+        self.retries = retries
+        self.backoff = backoff
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate)
+        # Created in the event loop that runs the records, like TokenBucket's lock
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _call(self, chain: LLMChain, inputs: Dict[str, Any], handler: MetricsHandler) -> str:
+        """Call one chain within the rate limit, retrying with exponential backoff and jitter."""
+        return await acall_chain(chain, inputs, [handler], self.retries, self.backoff, handler.record_retry,
+                                 before=self.bucket.acquire)
+
+    async def run_record(self, index: int, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index, "inputs": inputs}
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            handler = MetricsHandler("batch fused" if self.fused else "batch")
+            # Repair calls share the rate limit and retries of the pipeline calls
+            call = functools.partial(self._call, handler=handler)
+            try:
+                if self.fused:
+                    rows = dedupe_rows(parse_rows(await self._call(self.chains.rows, inputs, handler), self.columns))
+                    if self.generator is not None:
+                        rows, repairs = await arepair_rows(self.chains.rows, inputs, self.columns, rows, call=call)
+                        handler.record_repairs(repairs)
+                    result["rows"] = rows
+                    result["lines"] = render_lines(rows, inputs["framework"], inputs["aspect_ratio"])
+                else:
+                    table = dedupe_table(await self._call(self.chains.table, inputs, handler), self.columns)
+                    if self.generator is not None:
+                        table, repairs = await arepair_table(self.chains, self.generator, inputs, table, call=call)
+                        handler.record_repairs(repairs)
+                    result["table"] = table
+                    result["lines"] = await self._call(self.chains.line, {**inputs, "table": table}, handler)
+                    try:
+                        rows = parse_table(table, self.columns)
+                    except RowParseError:
+                        rows = []
+                    if self.generator is not None and rows:
+                        result["lines"], repairs = await arepair_lines(
+                            self.chains, self.generator, inputs, rows, result["lines"], call=call)
+                        handler.record_repairs(repairs)
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            metrics = handler.finish()
+        result["retries"] = metrics.retries
+        result["elapsed"] = round(metrics.elapsed, 3)
+        result["stages"] = {stage: [round(t, 3) for t in timings] for stage, timings in metrics.stages.items()}
+        result["tokens"] = {"prompt": metrics.prompt_tokens, "completion": metrics.completion_tokens}
+        result["cache_hits"] = metrics.cache_hits
+        result["repairs"] = metrics.repairs
+        if self.history is not None and self.generator is not None and "error" not in result:
+            self.history.record(self.generator.name, metrics.mode, inputs, result["lines"], table=result.get("table"),
+                                rows=result.get("rows"), metrics=metrics, model=self.model)
+        return result
+
+    async def run(self, records: Sequence[Dict[str, Any]], out_path: str) -> Dict[str, int]:
+        """Process every record and append each result to ``out_path`` as it completes."""
+        tasks = [asyncio.ensure_future(self.run_record(i, inputs)) for i, inputs in enumerate(records)]
+        summary = {"ok": 0, "failed": 0}
+        with open(out_path, "a", encoding="utf-8") as out:
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                summary["failed" if "error" in result else "ok"] += 1
+        return summary
+
+
+def prepare_records(records: Sequence[Dict[str, Any]], generator: Generator) -> List[Dict[str, Any]]:
+    """Fill in default values and reject records missing input variables."""
+    prepared = []
+    for i, record in enumerate(records):
+        try:
+            prepared.append(generator.validate_inputs(record))
+        except ValueError as e:
+            raise ValueError(f"Record {i}: {e}") from e
+    return prepared
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("generator", choices=sorted(GENERATORS))
+    parser.add_argument("inputs", help="CSV or JSONL file of input variables, one combination per row")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum records in flight")
+    parser.add_argument("--rate", type=float, default=1.0, help="maximum LLM calls per second (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=RETRIES, help="retries per LLM call")
+    parser.add_argument("--backoff", type=float, default=BACKOFF, help="initial retry delay in seconds")
+    parser.add_argument("--fused", action="store_true", help="use the single-call fused pipeline")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the response cache")
+    parser.add_argument("--no-history", action="store_true", help="do not store the generated sets")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"),
+                        help="OpenAI API key (defaults to $OPENAI_API_KEY)")
+    parser.add_argument("--creative-backend", default=DEFAULT_CREATIVE_BACKEND,
+                        help="backend of the table and row stages: openai[:model], llamacpp:<model.gguf> or fake")
+    parser.add_argument("--formatting-backend", default=DEFAULT_FORMATTING_BACKEND,
+                        help="backend of the prompt line and polish stages")
+    args = parser.parse_args(argv)
+
+    if not args.api_key and requires_api_key(args.creative_backend, args.formatting_backend):
+        parser.error("an OpenAI API key is required (--api-key or $OPENAI_API_KEY)")
+    generator = GENERATORS[args.generator]
+    try:
+        records = prepare_records(read_inputs(args.inputs), generator)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if not args.no_cache:
+        langchain.llm_cache = SQLiteLRUCache(DEFAULT_CACHE_PATH)
+    # Retries are handled here with backoff, so the LLM makes a single attempt per call
+    chains = build_chains(args.api_key, generator, cache=not args.no_cache,
+                          creative_backend=args.creative_backend, formatting_backend=args.formatting_backend,
+                          max_retries=1)
+    specs = [args.creative_backend] + ([] if args.fused else [args.formatting_backend])
+    runner = BatchRunner(chains, generator.columns, concurrency=args.concurrency, rate=args.rate,
+                         retries=args.retries, backoff=args.backoff, fused=args.fused,
+                         history=None if args.no_history else ResultStore(DEFAULT_HISTORY_PATH),
+                         generator=generator, model=backend_label(*specs))
+    summary = asyncio.run(runner.run(records, args.output))
+    print(f"{summary['ok']} succeeded, {summary['failed']} failed -> {args.output}", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
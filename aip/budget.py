@@ -0,0 +1,219 @@
+"""Prompt-token budgeting: local token counts, compact prompts and sized completions.
+
+The original prompts spell out every key element in prose and the line prompt
+re-sends the whole padded table. :class:`CompactPrompt` renders the same
+request tersely: fields set to "none" are dropped along with their column,
+the columns are a single ``a | b | c`` header and the table handed to the line
+prompt is stripped of padding, the divider row and empty columns.
+
+:class:`BudgetedLLMChain` sets ``max_tokens`` per call from ``row_numbers``
+instead of a fixed 1000, so small requests stop early and large ones are not
+truncated, never asking for more than the model's context has left. A
+prompt that leaves less than :data:`MIN_COMPLETION_TOKENS` of the context
+raises :class:`ContextOverflowError` instead of being sent.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain.callbacks.manager import AsyncCallbackManagerForChainRun, CallbackManagerForChainRun
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+from langchain.prompts.base import BasePromptTemplate, StringPromptTemplate
+from langchain.schema import LLMResult, PromptValue
+
+from aip.fused import EMPTY_VALUES, PROMPTS_TITLE
+from aip.schema import Generator
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Completion tokens for one generated value ("Soft golden-hour backlight") and one JSON key
+TOKENS_PER_VALUE = 8
+TOKENS_PER_KEY = 5
+# Framework, aspect ratio and list markup around the values of one prompt line
+TOKENS_PER_LINE = 24
+OUTPUT_MARGIN = 1.25
+MIN_COMPLETION_TOKENS = 128
+DEFAULT_CONTEXT_SIZE = 4097
+
+COMPACT_TABLE_TEMPLATE = """Markdown table of {row_numbers} rows breaking down a {framework} composition.
+Columns: {columns}
+Row 1: {first_row}
+Other rows: vary every column sensibly, each row distinct. Output only the table.
+"""
+COMPACT_ROWS_TEMPLATE = """JSON array of {row_numbers} variations of a {framework} composition.
+Keys: {columns}
+Variation 1: {first_row}
+Other variations: vary every key sensibly, each distinct. Output only the JSON array.
+"""
+COMPACT_UNSEEDED_ROWS_TEMPLATE = """JSON array of {row_numbers} variations of a {framework} composition.
+Keys: {columns}
+Base selection, already used, do not output it: {first_row}
+Variations: vary every key sensibly, each distinct and different from the base selection. Output only the JSON array.
+"""
+COMPACT_LINE_TEMPLATE = """One comma-separated summary sentence per table row, starting with "{framework}, " and ending with " —ar {aspect_ratio}".
+{table}
+Output a bulleted markdown list titled "### {title}".
+"""
+
+
+class ContextOverflowError(ValueError):
+    """Raised when a prompt leaves too little of the model's context for the completion."""
+
+
+def copy_model(model: Any, **update: Any) -> Any:
+    """Shallow copy of the pydantic ``model`` with the ``update`` values, like ``model.copy(update=...)``.
+
+    langchain declares ``callbacks``, ``callback_manager`` and ``lc_kwargs``
+    with ``Field(exclude=True)`` from 0.0.165 on. pydantic v1 ``copy()`` drops
+    excluded fields, of the model and of the models it holds (the prompt of a
+    chain), so a plain copy of an LLM or chain fails when it runs.
+    """
+    return type(model).construct(_fields_set=model.__fields_set__ | set(update), **{**model.__dict__, **update})
+
+
+@lru_cache(maxsize=None)
+def _encoding(model_name: str) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # The encodings are downloaded on first use, which fails offline
+        return None
+
+
+def count_tokens(text: str, model_name: str = "text-davinci-003") -> int:
+    """Tokens in ``text``, counted with tiktoken or estimated at 4 characters a token."""
+    encoding = _encoding(model_name)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def completion_budget(output_format: str, row_numbers: int, columns: int) -> int:
+    """``max_tokens`` for ``row_numbers`` rows of ``columns`` values in ``output_format``.
+
+    ``output_format`` is ``"table"`` (markdown table), ``"json"`` (fused rows)
+    or ``"lines"`` (one prompt line per row).
+    """
+    if output_format == "json":
+        per_row, header = columns * (TOKENS_PER_VALUE + TOKENS_PER_KEY), 2
+    elif output_format == "lines":
+        per_row, header = columns * TOKENS_PER_VALUE + TOKENS_PER_LINE, 10
+    else:
+        per_row, header = columns * (TOKENS_PER_VALUE + 1), columns * 4
+    return max(MIN_COMPLETION_TOKENS, math.ceil((header + per_row * row_numbers) * OUTPUT_MARGIN))
+
+
+def is_empty(value: Any) -> bool:
+    return str(value).strip().lower() in EMPTY_VALUES
+
+
+def compact_table(table: str) -> str:
+    """``table`` without cell padding, the divider row and columns that are empty in every row."""
+    rows = [[cell.strip() for cell in line.strip().strip("|").split("|")]
+            for line in table.splitlines() if line.strip().startswith("|")]
+    rows = [row for row in rows if not all(re.fullmatch(r":?-*:?", cell) for cell in row)]
+    if len(rows) < 2:
+        return table.strip()
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    keep = [i for i in range(width) if any(not is_empty(row[i]) for row in rows[1:])]
+    return "\n".join("|" + "|".join(row[i] for i in keep) + "|" for row in rows)
+
+
+class CompactPrompt(StringPromptTemplate):
+    """Terse table, fused-row or line prompt for a generator.
+
+    ``fields`` maps each field name to its column heading. Extra instructions
+    (shard hints, rows to avoid) are appended through ``suffix``. Row prompts
+    with ``seed_row=False`` only describe the selected values as the base
+    instead of asking for them as the first row.
+    """
+
+    kind: str
+    fields: Dict[str, str] = {}
+    suffix: str = ""
+    seed_row: bool = True
+
+    def format(self, **kwargs: Any) -> str:
+        kwargs = self._merge_partial_and_user_variables(**kwargs)
+        if self.kind == "lines":
+            text = COMPACT_LINE_TEMPLATE.format(framework=kwargs["framework"], aspect_ratio=kwargs["aspect_ratio"],
+                                                table=compact_table(kwargs["table"]), title=PROMPTS_TITLE)
+        else:
+            kept = [(column, kwargs[name]) for name, column in self.fields.items() if not is_empty(kwargs[name])]
+            if self.kind == "rows":
+                template = COMPACT_ROWS_TEMPLATE if self.seed_row else COMPACT_UNSEEDED_ROWS_TEMPLATE
+            else:
+                template = COMPACT_TABLE_TEMPLATE
+            separator = ", " if self.kind == "rows" else " | "
+            text = template.format(
+                row_numbers=kwargs["row_numbers"], framework=kwargs["framework"],
+                columns=separator.join(column for column, _ in kept),
+                first_row="; ".join(f"{column}={value}" for column, value in kept))
+        return text + self.suffix.format(**kwargs)
+
+    @property
+    def _prompt_type(self) -> str:
+        return "aip-compact"
+
+
+def compact_prompt(generator: Generator, kind: str) -> CompactPrompt:
+    """The compact ``"table"``, ``"rows"`` or ``"lines"`` prompt of ``generator``."""
+    if kind == "lines":
+        return CompactPrompt(kind=kind, input_variables=["table", "framework", "aspect_ratio"])
+    return CompactPrompt(kind=kind, fields={field.name: field.column_name for field in generator.fields},
+                         input_variables=[field.name for field in generator.fields] + ["framework", "row_numbers"])
+
+
+def extend_prompt(prompt: BasePromptTemplate, suffix: str, variables: Sequence[str]) -> BasePromptTemplate:
+    """``prompt`` followed by the template ``suffix`` using the extra ``variables``."""
+    input_variables = prompt.input_variables + list(variables)
+    if isinstance(prompt, CompactPrompt):
+        return copy_model(prompt, suffix=prompt.suffix + suffix, input_variables=input_variables)
+    return PromptTemplate(template=prompt.template + suffix, input_variables=input_variables)
+
+
+class BudgetedLLMChain(LLMChain):
+    """LLMChain that sizes ``max_tokens`` from the ``row_numbers`` of each call."""
+
+    output_format: str = "table"
+    columns: int = 1
+
+    def _budgeted_llm(self, input_list: List[Dict[str, Any]], prompts: List[PromptValue]) -> Any:
+        if not hasattr(self.llm, "max_tokens") or "row_numbers" not in input_list[0]:
+            return self.llm
+        rows = max(int(inputs["row_numbers"]) for inputs in input_list)
+        budget = completion_budget(self.output_format, rows, self.columns)
+        model_name = getattr(self.llm, "model_name", "text-davinci-003")
+        try:
+            context = self.llm.modelname_to_contextsize(model_name)
+        except (AttributeError, ValueError):
+            # Local models know their context size, unknown OpenAI models get the usual 4k
+            context = getattr(self.llm, "n_ctx", DEFAULT_CONTEXT_SIZE)
+        prompt_tokens = max(count_tokens(prompt.to_string(), model_name) for prompt in prompts)
+        if context - prompt_tokens < MIN_COMPLETION_TOKENS:
+            raise ContextOverflowError(
+                f"The prompt is {prompt_tokens} tokens, which leaves {max(0, context - prompt_tokens)} of the "
+                f"{context}-token context of {model_name} for the answer. Ask for fewer rows.")
+        return copy_model(self.llm, max_tokens=min(budget, context - prompt_tokens))
+
+    def generate(self, input_list: List[Dict[str, Any]],
+                 run_manager: Optional[CallbackManagerForChainRun] = None) -> LLMResult:
+        prompts, stop = self.prep_prompts(input_list, run_manager=run_manager)
+        return self._budgeted_llm(input_list, prompts).generate_prompt(
+            prompts, stop, callbacks=run_manager.get_child() if run_manager else None)
+
+    async def agenerate(self, input_list: List[Dict[str, Any]],
+                        run_manager: Optional[AsyncCallbackManagerForChainRun] = None) -> LLMResult:
+        prompts, stop = await self.aprep_prompts(input_list, run_manager=run_manager)
+        return await self._budgeted_llm(input_list, prompts).agenerate_prompt(
+            prompts, stop, callbacks=run_manager.get_child() if run_manager else None)
@@ -0,0 +1,92 @@
+"""Persistent response cache for the table and line chains."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain.cache import RETURN_VAL_TYPE, BaseCache
+from langchain.schema import Generation
+
+DEFAULT_CACHE_PATH = os.environ.get("AIP_CACHE_PATH", ".aip_cache.db")
+DEFAULT_MAX_ENTRIES = int(os.environ.get("AIP_CACHE_MAX_ENTRIES", "5000"))
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash the rendered prompt together with the LLM parameters.
+
+    ``llm_string`` is the serialized LLM config (model name, temperature,
+    max_tokens, ...), so the same prompt sent to a different model or at a
+    different temperature gets its own entry.
+    """
+    payload = json.dumps([prompt, llm_string], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteLRUCache(BaseCache):
+    """Size-bounded LRU cache of LLM generations stored in a local SQLite file."""
+
+    def __init__(self, database_path: str = DEFAULT_CACHE_PATH,
+                 max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.database_path = database_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " generations TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the cached generations and mark the entry as recently used."""
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generations FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return [Generation(**generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store the generations, evicting the least recently used entries."""
+        key = cache_key(prompt, llm_string)
+        generations = json.dumps(
+            [{"text": g.text, "generation_info": g.generation_info} for g in return_val])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, generations, last_used)"
+                " VALUES (?, ?, ?)", (key, generations, time.time()))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every cached response and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the current number of entries."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -0,0 +1,61 @@
+"""Build the table, line and fused row chains for a generator."""
+from typing import Any, NamedTuple, Optional
+
+from langchain.chains import LLMChain, SequentialChain
+from langchain.prompts import PromptTemplate
+
+from aip.backends import Router
+from aip.budget import BudgetedLLMChain, compact_prompt
+from aip.offline import POLISH_TEMPLATE
+from aip.schema import LINE_TEMPLATE, Generator
+
+LINE_PROMPT = PromptTemplate.from_template(LINE_TEMPLATE)
+POLISH_PROMPT = PromptTemplate.from_template(POLISH_TEMPLATE)
+
+
+class Chains(NamedTuple):
+    table: LLMChain
+    line: LLMChain
+    seq: SequentialChain
+    rows: LLMChain
+    polish: LLMChain
+
+
+def build_chains(api_key: Optional[str], generator: Generator, cache: Optional[bool] = None,
+                 streaming: bool = False, verbose: bool = False, compact: bool = True,
+                 creative_backend: Optional[str] = None, formatting_backend: Optional[str] = None,
+                 **llm_kwargs: Any) -> Chains:
+    """Create the LLMs and chains for ``generator``.
+
+    The table and row chains run on ``creative_backend`` at temperature 0.7,
+    the line and polish chains on ``formatting_backend`` at temperature 0 (see
+    :mod:`aip.backends`; both default to OpenAI). ``cache`` and ``streaming``
+    are passed to the LLMs; any extra keyword arguments (``max_retries``,
+    ``request_timeout``, ...) are passed to the OpenAI ones too.
+    With ``compact`` the table, row and line chains use the terse prompts of
+    :mod:`aip.budget` instead of the generator's templates. Every chain sizes
+    ``max_tokens`` from ``row_numbers``; 1000 is only the fallback.
+    """
+    router = Router(api_key, creative=creative_backend, formatting=formatting_backend,
+                    cache=cache, streaming=streaming, **llm_kwargs)
+    columns = len(generator.fields)
+    # Initialize LLMChain with the prompt and LLM
+    table_chain = BudgetedLLMChain(
+        prompt=compact_prompt(generator, "table") if compact else generator.table_prompt,
+        llm=router.llm("table"), output_key="table", output_format="table", columns=columns, verbose=verbose)
+    line_chain = BudgetedLLMChain(
+        prompt=compact_prompt(generator, "lines") if compact else LINE_PROMPT,
+        llm=router.llm("line"), output_key="lines", output_format="lines", columns=columns, verbose=verbose)
+    rows_chain = BudgetedLLMChain(
+        prompt=compact_prompt(generator, "rows") if compact else generator.rows_prompt,
+        llm=router.llm("rows"), output_key="rows", output_format="json", columns=columns, verbose=verbose)
+    # Offline rows are rendered locally, polishing them is a deterministic rewrite
+    polish_chain = BudgetedLLMChain(prompt=POLISH_PROMPT, llm=router.llm("polish"), output_key="lines",
+                                    output_format="lines", columns=columns, verbose=verbose)
+    seq_chain = SequentialChain(
+        chains=[table_chain, line_chain],
+        input_variables=generator.input_variables,
+        output_variables=["table", "lines"],
+        verbose=verbose,
+    )
+    return Chains(table_chain, line_chain, seq_chain, rows_chain, polish_chain)
@@ -0,0 +1,107 @@
+"""Single-call generation: ask the model for JSON rows, format prompts locally."""
+import json
+import re
+from typing import Dict, List, Sequence
+
+PROMPTS_TITLE = "Suggested Prompts for Midjourney"
+EMPTY_VALUES = {"", "none", "n/a", "null"}
+
+
+class RowParseError(ValueError):
+    """Raised when the model output does not contain a JSON list of rows."""
+
+
+def _normalize_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", key.lower())
+
+
+def parse_rows(text: str, columns: Sequence[str]) -> List[Dict[str, str]]:
+    """Extract the JSON array of rows from ``text``.
+
+    Keys are matched to ``columns`` ignoring case, spaces and punctuation, so
+    ``"camera_angle"`` and ``"Camera Angle"`` land in the same column. Missing
+    keys become empty strings.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        raise RowParseError("No JSON list found in the model output.")
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise RowParseError(f"Model output is not valid JSON: {e}") from e
+
+    lookup = {_normalize_key(column): column for column in columns}
+    rows = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        row = {column: "" for column in columns}
+        for key, value in item.items():
+            column = lookup.get(_normalize_key(str(key)))
+            if column is not None and value is not None:
+                row[column] = str(value).strip()
+        rows.append(row)
+    if not rows:
+        raise RowParseError("The JSON list in the model output has no rows.")
+    return rows
+
+
+def _table_lines(text: str) -> List[str]:
+    table = [line.strip().strip("|") for line in text.splitlines() if line.strip().startswith("|")]
+    return [line for line in table if not re.fullmatch(r"[\s:|-]*", line)]
+
+
+def table_columns(text: str, columns: Sequence[str]) -> List[str]:
+    """The ``columns`` found in the header of the markdown table in ``text``."""
+    table = _table_lines(text)
+    lookup = {_normalize_key(column): column for column in columns}
+    found = {lookup.get(_normalize_key(cell)) for cell in table[0].split("|")} if table else set()
+    return [column for column in columns if column in found]
+
+
+def parse_table(text: str, columns: Sequence[str]) -> List[Dict[str, str]]:
+    """Extract the rows of the markdown table the two-chain table prompt returns.
+
+    Headers are matched to ``columns`` like the keys in :func:`parse_rows`.
+    """
+    table = _table_lines(text)
+    if len(table) < 2:
+        raise RowParseError("No markdown table found in the model output.")
+    lookup = {_normalize_key(column): column for column in columns}
+    header = [lookup.get(_normalize_key(cell)) for cell in table[0].split("|")]
+    if not any(header):
+        raise RowParseError("The table headers do not match the generator columns.")
+    rows = []
+    for line in table[1:]:
+        row = {column: "" for column in columns}
+        for column, cell in zip(header, line.split("|")):
+            if column is not None:
+                row[column] = cell.strip()
+        rows.append(row)
+    return rows
+
+
+def render_table(rows: Sequence[Dict[str, str]], columns: Sequence[str]) -> str:
+    """Rows as a markdown table, the format the two-chain table prompt returns."""
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    lines += ["| " + " | ".join(row.get(column, "") for column in columns) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def split_lines(text: str) -> List[str]:
+    """The prompts of a bulleted (or numbered) markdown list, without the markers."""
+    return [re.sub(r"^([-*+]|\d+[.)])\s+", "", line.strip()) for line in text.splitlines()
+            if re.match(r"^\s*([-*+]|\d+[.)])\s+", line)]
+
+
+def format_line(row: Dict[str, str], framework: str, aspect_ratio: str) -> str:
+    """Render one row as a ``{framework} ... —ar {aspect_ratio}`` prompt."""
+    values = [value for value in row.values()
+              if value.strip().lower() not in EMPTY_VALUES]
+    return f"{framework}, {', '.join(values)} —ar {aspect_ratio}"
+
+
+def render_lines(rows: Sequence[Dict[str, str]], framework: str, aspect_ratio: str) -> str:
+    """Render rows as the bulleted markdown list the two-chain mode produces."""
+    lines = [f"- {format_line(row, framework, aspect_ratio)}" for row in rows]
+    return "\n".join([f"### {PROMPTS_TITLE}", *lines])
@@ -0,0 +1,226 @@
+"""The general and film photography generators."""
+from aip.schema import Field, Generator
+
+GENERAL_TABLE_TEMPLATE = """
+Please create a table that breaks down a {framework} composition into the following key elements, where each of these key elements is a column: Composition, Camera Angle, Style, Room Type, Focal Point, Textures, Detail, Color Palette, Brand, Lighting, Location, Time of Day, Mood, Architecture.
+Fill the table with {row_numbers} rows of data where:
+composition = {composition}
+camera_angle = {camera_angle}
+style = {style}
+room_type = {room_type}
+focal_point = {focal_point}
+textures = {textures}
+detail = {detail}
+color_palette = {color_palette}
+brand = {brand}
+lighting = {lighting}
+location = {location}
+time_of_day = {time_of_day}
+mood = {mood}
+architecture = {architecture}
+"""
+GENERAL_ROWS_TEMPLATE = """
+Please break down {row_numbers} variations of a {framework} composition into the following key elements: Composition, Camera Angle, Style, Room Type, Focal Point, Textures, Detail, Color Palette, Brand, Lighting, Location, Time of Day, Mood, Architecture.
+Base the variations on the following data:
+composition = {composition}
+camera_angle = {camera_angle}
+style = {style}
+room_type = {room_type}
+focal_point = {focal_point}
+textures = {textures}
+detail = {detail}
+color_palette = {color_palette}
+brand = {brand}
+lighting = {lighting}
+location = {location}
+time_of_day = {time_of_day}
+mood = {mood}
+architecture = {architecture}
+Respond only with a JSON array of {row_numbers} objects, one per variation, each using the key elements above as its keys.
+"""
+
+GENERAL = Generator(
+    name="general",
+    title="Additive Prompt Generator for Midjourney",
+    framework_options=("Interior architecture photograph", "Landscape photograph", "Street photography",
+                       "Macro photography", "Portrait photograph"),
+    table_template=GENERAL_TABLE_TEMPLATE,
+    rows_template=GENERAL_ROWS_TEMPLATE,
+    fields=(
+        Field("composition", "Composition", (
+            "Rule of thirds", "Symmetrical", "Diagonal lines", "Leading lines",
+            "Frame within a frame",
+        )),
+        Field("camera_angle", "Camera Angle", (
+            "Eye level", "High angle", "Low angle", "Bird's eye view", "Worm's eye view",
+        )),
+        Field("style", "Style", (
+            "Minimalist", "Vintage", "Modern", "Industrial", "Rustic",
+        )),
+        Field("room_type", "Room Type", (
+            "Living room", "Bedroom", "Kitchen", "Bathroom", "Office",
+        )),
+        Field("focal_point", "Focal Point", (
+            "Furniture", "Window", "Artwork", "Fireplace", "Accent wall",
+        )),
+        Field("textures", "Textures", (
+            "Wood", "Stone", "Metal", "Glass", "Fabric",
+        )),
+        Field("detail", "Detail", (
+            "Architectural details", "Decorative items", "Patterns", "Fixtures", "Flooring",
+        )),
+        Field("color_palette", "Color Palette", (
+            "Monochrome", "Pastels", "Warm colors", "Cool colors", "Complementary colors",
+        ), panel=1),
+        Field("brand", "Brand", (
+            "IKEA", "Crate & Barrel", "West Elm", "Restoration Hardware", "CB2",
+        ), panel=1),
+        Field("lighting", "Lighting", (
+            "Natural light", "Ambient lighting", "Accent lighting", "Task lighting", "Backlighting",
+        ), panel=1),
+        Field("location", "Location", (
+            "Urban", "Suburban", "Rural", "Coastal", "Mountainous",
+        ), panel=1),
+        Field("time_of_day", "Time of Day", (
+            "Sunrise", "Morning", "Midday", "Sunset", "Night",
+        ), panel=1),
+        Field("mood", "Mood", (
+            "Calm", "Inviting", "Dramatic", "Cozy", "Energetic",
+        ), panel=1),
+        Field("architecture", "Architecture", (
+            "Modern", "Traditional", "Victorian", "Art Deco", "Mid-century",
+        ), panel=1),
+    ),
+)
+
+PHOTO_TABLE_TEMPLATE = '''
+Please create a table with {row_numbers} rows that breaks down a {framework} composition into the following key elements, where each of these key elements is a column: 
+Subject, Location, Clothing Type, Clothing Color, Shot Type, Color Pallet, Styling, Lighting, Ambiance, Film Type, Lens, Fine Tuning.
+If a column data listed below is "none", then leave the cell blank.
+
+Fill the first row of the table with data where:
+Subject = {subject}
+Location = {location}
+Clothing Type = {clothing_type}
+Clothing Color = {clothing_color}
+Shot Type = {shot_type}
+Color Pallet = {color_pallet}
+Styling = {styling}
+Lighting = {lighting}
+Ambiance = {ambiance}
+Film Type = {film_type}
+Lens = {lens}
+Fine Tuning = {fine_tuning}
+
+Then use a variety of data for all subsequent rows, ensuring that it differs from the first and all other rows and aligns with the key elements listed above in a sensible way.
+'''
+PHOTO_ROWS_TEMPLATE = '''
+Please break down {row_numbers} variations of a {framework} composition into the following key elements:
+Subject, Location, Clothing Type, Clothing Color, Shot Type, Color Pallet, Styling, Lighting, Ambiance, Film Type, Lens, Fine Tuning.
+If a key element listed below is "none", then leave its value empty.
+
+Use the following data for the first variation:
+Subject = {subject}
+Location = {location}
+Clothing Type = {clothing_type}
+Clothing Color = {clothing_color}
+Shot Type = {shot_type}
+Color Pallet = {color_pallet}
+Styling = {styling}
+Lighting = {lighting}
+Ambiance = {ambiance}
+Film Type = {film_type}
+Lens = {lens}
+Fine Tuning = {fine_tuning}
+
+Then use a variety of data for all subsequent variations, ensuring that each differs from the first and all others and aligns with the key elements listed above in a sensible way.
+Respond only with a JSON array of {row_numbers} objects, one per variation, each using the key elements above as its keys.
+'''
+
+PHOTO = Generator(
+    name="photo",
+    title="Film Photography - Additive Prompt Generator for Midjourney",
+    framework="Film photography photograph",
+    table_template=PHOTO_TABLE_TEMPLATE,
+    rows_template=PHOTO_ROWS_TEMPLATE,
+    fields=(
+        Field("subject", "Subject", (
+            "Landscape", "Portrait", "Wildlife", "Street photography", "Architecture",
+            "Product photography", "Macro photography", "Wedding", "Sport", "Travel photography",
+            "Fashion photography", "Food photography", "Astrophotography",
+            "Black and white photography", "Still life photography", "Documentary photography",
+        )),
+        Field("film_type", "Film Type", (
+            "Kodak Gold 400", "Porta 400", "Fujifilm Pro 160C", "Agfa Vista 400", "Ilford HP5 Plus",
+            "Kodak Tri-X 400", "Fujifilm Velvia 50", "Ilford Delta 3200", "Kodak Ektar 100",
+            "Fuji Provia 100F", "Lomography Color Negative 400", "CineStill 800T",
+            "Kodak Portra 800", "Fujifilm Superia X-TRA 400", "Ilford XP2 Super 400",
+            "Kodak T-MAX 400", "Fujifilm Neopan 100 Acros",
+        )),
+        Field("color_pallet", "Color Pallet", (
+            "Black and white", "Monochromatic", "Analogous", "Complementary", "Triadic", "Tetradic",
+            "Split Complementary", "Double Complementary", "Warm Colors", "Cool Colors",
+            "Neutral Colors", "Pastel Colors", "Bold Colors", "Earth Tones", "Jewel Tones",
+            "Muted Tones", "Bright Colors", "Primary Colors", "Secondary Colors", "Tertiary Colors",
+            "Gradient Colors", "Rainbow Colors", "Metallic Colors", "Vintage Colors",
+            "Retro Colors", "Muted Pastels", "Saturated Colors", "Desaturated Colors",
+            "High-Contrast Colors",
+        )),
+        Field("lens", "Camera Lens", (
+            "Canon FD 50mm f/1.4", "Nikon Nikkor-S 50mm f/1.4", "Leica Summicron-M 50mm f/2",
+            "Minolta MC Rokkor-PG 50mm f/1.4", "Pentax Super-Takumar 50mm f/1.4",
+            "Carl Zeiss Jena Tessar 50mm f/2.8", "Voigtlander Nokton 50mm f/1.5",
+            "Olympus Zuiko 50mm f/1.8", "Yashica ML 50mm f/1.4", "Contax Planar 50mm f/1.4", "",
+        ), column="Lens"),
+        Field("lighting", "Lighting", (
+            "Natural light", "Back-lit", "Edge-lit", "Continuous lighting", "Flash photography",
+            "Strobe lighting", "Softbox", "Umbrella", "Ring light", "Beauty dish", "LED panels",
+            "Reflector", "Gobo", "Snoot", "Barndoor", "Grid", "Honeycomb", "Diffuser",
+        )),
+        Field("shot_type", "Shot Type", (
+            "Close-up", "Low angle", "Birds-eye view", "High angle", "Wide shot", "Medium shot",
+            "Full shot", "Extreme close-up", "Over-the-shoulder shot", "Point-of-view shot",
+            "Dutch angle", "Tilt shot", "Panning shot", "Zoom shot", "Tracking shot", "Crane shot",
+            "Handheld shot", "Static shot", "Long shot", "Two-shot", "Reverse shot",
+        )),
+        Field("styling", "Styling", (
+            "Street", "Warhol", "Anime", "Picasso", "Minimalism", "Abstract", "Surrealism",
+            "Conceptual", "Documentary", "Landscape", "Portrait", "Fashion", "Fine art",
+            "Black and white", "Color", "Vintage", "Film noir", "Gothic", "High-key", "Low-key",
+            "HDR", "Bokeh", "Tilt-shift", "Long exposure", "Infrared", "Silhouette",
+        )),
+        Field("ambiance", "Ambiance", (
+            "Mysty", "Smokey", "Dreamy", "Spooky", "Romantic", "Magical", "Serene", "Ethereal",
+            "Whimsical", "Charming", "Enchanting", "Nostalgic", "Melancholic", "Gritty",
+            "Industrial", "Lively", "Vibrant", "Gloomy", "Mysterious", "Intimate", "Relaxing",
+            "Cheerful", "Energetic", "Peaceful",
+        ), panel=1),
+        Field("location", "Location", (
+            "New York", "High Mountains", "Ancient Egypt", "Underwater",
+            "International Space Station", "Seattle", "Paris", "Tropical Island", "Rainforest",
+            "Desert", "Small town", "Countryside", "Castle", "Amusement Park", "Factory", "Library",
+            "Museum", "College Campus", "Train Station", "Subway", "Zoo", "Airport", "Harbor",
+            "Farm", "Shopping Mall",
+        ), panel=1),
+        Field("fine_tuning", "Fine Tuning", (
+            "Fine-grain", "4k", "Light Leaks", "Double Exposure", "Slow Shutter Speed",
+            "High Depth of Field", "Shallow Depth of Field", "Lens distortion",
+            "Chromatic Aberration", "Vignetting", "High Clarity", "High Sharpness",
+            "High Saturation", "Low Saturation", "High Contrast", "Low Contrast", "Split Toning",
+        ), panel=1),
+        Field("clothing_type", "Clothing Type", (
+            "None", "Dress", "Top", "T-Shirt", "Blouse", "Sweater", "Cardigan", "Jacket", "Coat",
+            "Jeans", "Trouser", "Legging", "Skirt", "Shorts", "Swimsuit", "Sleepwear", "Robe",
+            "Jumpsuit", "Bodysuit", "Suit", "Formalwear", "Sportswear", "Activewear", "Hoodie",
+            "Sweatshirt", "Vest", "Tank Top", "Crop Top",
+        ), panel=1),
+        Field("clothing_color", "Clothing Color", (
+            "None", "Black", "White", "Gray", "Navy", "Blue", "Red", "Burgundy", "Purple", "Pink",
+            "Magenta", "Orange", "Yellow", "Green", "Teal", "Turquoise", "Beige", "Brown", "Olive",
+            "Mustard", "Gold", "Silver", "Metallic", "Pastel", "Neon", "Earth Tones", "Jewel Tones",
+            "Muted Tones", "Bright Colors", "Primary Colors",
+        ), panel=1),
+    ),
+)
+
+GENERATORS = {generator.name: generator for generator in (GENERAL, PHOTO)}
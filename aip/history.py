@@ -0,0 +1,251 @@
+"""Local store of every generated prompt set, for browsing and export.
+
+Each run (inputs, table, prompt lines, rows, timings and model) is appended to
+a SQLite file. The field values of every run are also kept in their own
+indexed table, so past sets are found by value instead of being generated
+again::
+
+    python -m aip.history list --generator photo --where subject=Portrait
+    python -m aip.history export --format csv -o photo.csv --generator photo
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from aip.backends import DEFAULT_OPENAI_MODEL, parse_backend
+from aip.fused import split_lines
+from aip.schema import Generator
+
+DEFAULT_HISTORY_PATH = os.environ.get("AIP_HISTORY_PATH", ".aip_history.db")
+EXPORT_FORMATS = ("csv", "jsonl")
+# Run columns written before the input values in CSV exports
+CSV_COLUMNS = ["id", "created", "generator", "mode", "model", "elapsed", "prompts", "table"]
+
+
+def backend_label(*specs: str) -> str:
+    """The distinct models behind backend specs, e.g. ``openai:text-davinci-003``."""
+    labels = []
+    for spec in specs:
+        kind, argument = parse_backend(spec)
+        if kind == "openai":
+            argument = argument or DEFAULT_OPENAI_MODEL
+        label = f"{kind}:{os.path.basename(argument)}" if argument else kind
+        if label not in labels:
+            labels.append(label)
+    return " + ".join(labels)
+
+
+class ResultStore:
+    """Append-only SQLite store of generated prompt sets."""
+
+    def __init__(self, database_path: str = DEFAULT_HISTORY_PATH) -> None:
+        self.database_path = database_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " id INTEGER PRIMARY KEY,"
+            " created REAL NOT NULL,"
+            " generator TEXT NOT NULL,"
+            " mode TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " inputs TEXT NOT NULL,"
+            " table_text TEXT,"
+            " lines TEXT NOT NULL,"
+            " rows TEXT,"
+            " metrics TEXT,"
+            " elapsed REAL);"
+            "CREATE INDEX IF NOT EXISTS runs_generator ON runs (generator, created);"
+            "CREATE TABLE IF NOT EXISTS run_values ("
+            " run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,"
+            " name TEXT NOT NULL,"
+            " value TEXT NOT NULL COLLATE NOCASE);"
+            "CREATE INDEX IF NOT EXISTS run_values_value ON run_values (name, value, run_id);"
+        )
+        self._conn.commit()
+
+    def record(self, generator: str, mode: str, inputs: Mapping[str, Any], lines: str,
+               table: Optional[str] = None, rows: Optional[Sequence[Mapping[str, str]]] = None,
+               metrics: Any = None, model: str = "") -> int:
+        """Append one run and return its id. ``metrics`` may be a ``RequestMetrics``."""
+        if is_dataclass(metrics):
+            metrics = asdict(metrics)
+        elapsed = metrics.get("elapsed") if metrics else None
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (created, generator, mode, model, inputs, table_text, lines, rows, metrics, elapsed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), generator, mode, model, json.dumps(dict(inputs), ensure_ascii=False), table, lines,
+                 None if rows is None else json.dumps(list(rows), ensure_ascii=False),
+                 None if metrics is None else json.dumps(metrics), elapsed))
+            self._conn.executemany(
+                "INSERT INTO run_values (run_id, name, value) VALUES (?, ?, ?)",
+                [(cursor.lastrowid, name, str(value)) for name, value in inputs.items()])
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def query(self, generator: Optional[str] = None, mode: Optional[str] = None,
+              where: Optional[Mapping[str, str]] = None, limit: Optional[int] = 50,
+              offset: int = 0) -> List[Dict[str, Any]]:
+        """Runs, newest first, optionally filtered by input values (case-insensitive)."""
+        clauses, params = [], []
+        if generator is not None:
+            clauses.append("generator = ?")
+            params.append(generator)
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        for name, value in (where or {}).items():
+            clauses.append("id IN (SELECT run_id FROM run_values WHERE name = ? AND value = ?)")
+            params += [name, str(value)]
+        sql = "SELECT * FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created DESC, id DESC LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            return [self._run(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return None if row is None else self._run(row)
+
+    def values(self, name: str, generator: Optional[str] = None) -> List[Tuple[str, int]]:
+        """The stored values of input ``name`` with their run counts, most used first."""
+        sql = "SELECT value, COUNT(*) FROM run_values WHERE name = ?"
+        params: List[Any] = [name]
+        if generator is not None:
+            sql += " AND run_id IN (SELECT id FROM runs WHERE generator = ?)"
+            params.append(generator)
+        sql += " GROUP BY value ORDER BY COUNT(*) DESC, value"
+        with self._lock:
+            return [(value, count) for value, count in self._conn.execute(sql, params).fetchall()]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    @staticmethod
+    def _run(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "created": row["created"],
+            "generator": row["generator"],
+            "mode": row["mode"],
+            "model": row["model"],
+            "inputs": json.loads(row["inputs"]),
+            "table": row["table_text"],
+            "lines": row["lines"],
+            "rows": None if row["rows"] is None else json.loads(row["rows"]),
+            "metrics": None if row["metrics"] is None else json.loads(row["metrics"]),
+            "elapsed": row["elapsed"],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def runs_to_jsonl(runs: Sequence[Mapping[str, Any]]) -> str:
+    return "".join(json.dumps(run, ensure_ascii=False) + "\n" for run in runs)
+
+
+def runs_to_csv(runs: Sequence[Mapping[str, Any]]) -> str:
+    """One CSV row per run: the run columns, then every input value seen in ``runs``."""
+    input_columns: List[str] = []
+    for run in runs:
+        input_columns += [name for name in run["inputs"] if name not in input_columns]
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS + input_columns, restval="")
+    writer.writeheader()
+    for run in runs:
+        writer.writerow({
+            **run["inputs"],
+            "id": run["id"],
+            "created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["created"])),
+            "generator": run["generator"],
+            "mode": run["mode"],
+            "model": run["model"],
+            "elapsed": "" if run["elapsed"] is None else round(run["elapsed"], 3),
+            "prompts": run["lines"],
+            "table": run["table"] or "",
+        })
+    return out.getvalue()
+
+
+def export_runs(runs: Sequence[Mapping[str, Any]], export_format: str) -> str:
+    """``runs`` as ``"csv"`` or ``"jsonl"`` text."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}, expected one of: {', '.join(EXPORT_FORMATS)}")
+    return runs_to_csv(runs) if export_format == "csv" else runs_to_jsonl(runs)
+
+
+def parse_where(conditions: Sequence[str], generator: Optional[Generator] = None) -> Dict[str, str]:
+    """``name=value`` conditions as a dict, checking the names against ``generator``."""
+    where = {}
+    for condition in conditions:
+        name, sep, value = condition.partition("=")
+        if not sep:
+            raise ValueError(f"Expected name=value, got {condition!r}")
+        if generator is not None and name not in generator.input_variables:
+            raise ValueError(f"{generator.name} has no input {name!r}")
+        where[name] = value
+    return where
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from aip.generators import GENERATORS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["list", "export"])
+    parser.add_argument("--database", default=DEFAULT_HISTORY_PATH, help="history database file")
+    parser.add_argument("--generator", choices=sorted(GENERATORS))
+    parser.add_argument("--mode", help="only runs of this generation mode")
+    parser.add_argument("--where", action="append", default=[], metavar="NAME=VALUE",
+                        help="only runs with this input value (repeatable)")
+    parser.add_argument("--limit", type=int, help="newest runs only (default: 20 for list, all for export)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    parser.add_argument("-o", "--output", help="export file (defaults to stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        where = parse_where(args.where, GENERATORS.get(args.generator))
+    except ValueError as e:
+        parser.error(str(e))
+    if not os.path.exists(args.database):
+        parser.error(f"no history database at {args.database}")
+    store = ResultStore(args.database)
+    limit = args.limit if args.limit is not None else (20 if args.command == "list" else None)
+    runs = store.query(args.generator, args.mode, where, limit=limit)
+
+    if args.command == "list":
+        for run in runs:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created"]))
+            prompts = len(split_lines(run["lines"]))
+            print(f"{run['id']:>6}  {created}  {run['generator']:<10} {run['mode']:<26} {prompts:>3} prompts  "
+                  f"{run['model']}")
+        return 0
+    text = export_runs(runs, args.format)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+        print(f"{len(runs)} runs -> {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
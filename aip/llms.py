@@ -0,0 +1,116 @@
+"""LLMs that run without the OpenAI API: a deterministic fake and a local llama.cpp model.
+
+:class:`FakeLLM` answers the table, line, fused-row and polish prompts with
+canned but well-formed completions derived from the prompt, so the whole
+pipeline can run offline, in CI and in the benchmarks. :class:`LocalLlamaCpp`
+runs a GGUF model on the CPU through ``llama-cpp-python``.
+"""
+import asyncio
+import json
+import re
+import threading
+from typing import List, Optional
+
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain.llms import LlamaCpp
+from langchain.llms.base import LLM
+
+WORDS = ("golden", "hour", "soft", "grain", "quiet", "street", "velvet", "shadow", "amber", "mist",
+         "linen", "harbor", "neon", "dusk", "marble", "fern")
+
+
+def _row_count(prompt: str) -> int:
+    match = re.search(r"(\d+) (?:rows|variations)", prompt) or re.search(r"with (\d+) rows", prompt)
+    if match:
+        return int(match.group(1))
+    return max(1, prompt.count("\n|") - 2)
+
+
+def _columns(prompt: str) -> List[str]:
+    match = re.search(r"key elements[^:]*:\s*(.+?)\.\n", prompt, re.S)
+    if match:
+        return [c.strip() for c in match.group(1).split(",")]
+    # Compact prompts list the columns on one line
+    match = re.search(r"^(?:Columns|Keys): (.+)$", prompt, re.M)
+    return [c.strip() for c in re.split(r"[|,]", match.group(1))] if match else ["Subject", "Style"]
+
+
+def _value(row: int, column: int) -> str:
+    return f"{WORDS[(row * 7 + column) % len(WORDS)]} {WORDS[(row + column * 3) % len(WORDS)]} {row + 1}"
+
+
+def canned_completion(prompt: str) -> str:
+    """A plausible completion for the table, line, fused-row or polish prompt."""
+    if "summary sentence" in prompt:
+        framework, aspect_ratio = "Photograph", "16:9"
+        match = (re.search(r"Prepend each sentence with (.+?) and append each sentence with \" —ar (.+?)\"", prompt)
+                 or re.search(r"starting with \"(.+?), \" and ending with \" —ar (.+?)\"", prompt))
+        if match:
+            framework, aspect_ratio = match.groups()
+        rows = [line for line in prompt.splitlines() if line.startswith("|") and "---" not in line][1:]
+        rows = rows or [line for line in prompt.splitlines() if line.startswith("- ")]
+        lines = [f"- {framework}, {', '.join(c.strip() for c in row.strip('|-').split('|') if c.strip())} —ar {aspect_ratio}"
+                 for row in rows]
+        return "\n".join(["### Suggested Prompts for Midjourney", *lines])
+    columns, rows = _columns(prompt), _row_count(prompt)
+    if "JSON array" in prompt:
+        # Regeneration prompts list the existing rows; start past them so the new rows differ
+        _, _, existing = prompt.partition("These rows already exist")
+        offset = len(existing)
+        return json.dumps([{column: _value(offset + r, c) for c, column in enumerate(columns)}
+                           for r in range(rows)])
+    header = "| " + " | ".join(columns) + " |"
+    divider = "|" + "---|" * len(columns)
+    body = ["| " + " | ".join(_value(r, c) for c in range(len(columns))) + " |" for r in range(rows)]
+    return "\n".join([header, divider, *body])
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeLLM(LLM):
+    """Deterministic LLM returning :func:`canned_completion` for every prompt."""
+
+    streaming: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "aip-fake"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None) -> str:
+        text = canned_completion(prompt)
+        if self.streaming and run_manager:
+            for token in _tokens(text):
+                run_manager.on_llm_new_token(token)
+        return text
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None) -> str:
+        text = canned_completion(prompt)
+        if self.streaming and run_manager:
+            for token in _tokens(text):
+                await run_manager.on_llm_new_token(token)
+        return text
+
+
+# One llama.cpp model evaluates one prompt at a time
+_LLAMA_LOCK = threading.Lock()
+
+
+class LocalLlamaCpp(LlamaCpp):
+    """llama.cpp model that can also be called from async chains.
+
+    Async calls run in a worker thread, one at a time, without token streaming.
+    """
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None) -> str:
+        with _LLAMA_LOCK:
+            return super()._call(prompt, stop=stop, run_manager=run_manager)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self._call(prompt, stop=stop))
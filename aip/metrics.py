@@ -0,0 +1,248 @@
+"""Per-request stage timings, token counts, cache hits, retries and repairs.
+
+:class:`MetricsHandler` is a langchain callback attached to one request. It
+records the wall time of every LLMChain stage (keyed by the chain's output key:
+``table``, ``lines``, ``rows``, ...), the prompt and completion tokens reported
+by OpenAI (counted locally for streamed completions, which report none), cache
+hits, retries and repairs. When the request finishes they are added to
+a :class:`MetricsRegistry`, which renders them in the Prometheus text format.
+If OpenTelemetry is installed every stage is also exported as a span.
+"""
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import LLMResult
+
+from aip.budget import count_tokens
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+# Chains that call the LLM; the SequentialChain around them is not a stage
+STAGE_CHAINS = {"LLMChain", "BudgetedLLMChain"}
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class RequestMetrics:
+    mode: str = ""
+    stages: Dict[str, List[float]] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    # Targeted repair calls and local fixes of malformed output (aip.repair)
+    repairs: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class StageHistogram:
+    # Cumulative count per STAGE_BUCKETS bound, as Prometheus exposes them
+    buckets: List[int] = field(default_factory=lambda: [0] * len(STAGE_BUCKETS))
+    sum: float = 0.0
+    count: int = 0
+
+    def observe(self, seconds: float) -> None:
+        for i in range(bisect.bisect_left(STAGE_BUCKETS, seconds), len(STAGE_BUCKETS)):
+            self.buckets[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Process-wide counters and stage-latency histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._histograms: Dict[str, StageHistogram] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._histograms.setdefault(stage, StageHistogram()).observe(seconds)
+
+    def record(self, metrics: RequestMetrics) -> None:
+        """Add one finished request to the totals."""
+        self.inc("aip_requests_total", mode=metrics.mode)
+        self.inc("aip_tokens_total", metrics.prompt_tokens, kind="prompt")
+        self.inc("aip_tokens_total", metrics.completion_tokens, kind="completion")
+        self.inc("aip_llm_calls_total", metrics.llm_calls)
+        self.inc("aip_cache_hits_total", metrics.cache_hits)
+        self.inc("aip_retries_total", metrics.retries)
+        self.inc("aip_repairs_total", metrics.repairs)
+        for stage, timings in metrics.stages.items():
+            for seconds in timings:
+                self.observe_stage(stage, seconds)
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+            if self._histograms:
+                lines.append("# TYPE aip_stage_seconds histogram")
+            for stage, histogram in sorted(self._histograms.items()):
+                for bucket, count in zip(STAGE_BUCKETS, histogram.buckets):
+                    lines.append(f'aip_stage_seconds_bucket{{stage="{stage}",le="{bucket:g}"}} {count}')
+                lines.append(f'aip_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'aip_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'aip_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsHandler(BaseCallbackHandler):
+    """Collect the metrics of one request; pass it as a chain callback."""
+
+    def __init__(self, mode: str = "", registry: Optional[MetricsRegistry] = REGISTRY) -> None:
+        self.metrics = RequestMetrics(mode=mode)
+        self.registry = registry
+        # Async chains call sync handlers from executor threads
+        self._lock = threading.Lock()
+        self._stages: Dict[UUID, Tuple[float, bool, Any]] = {}
+        # Prompts of the LLM calls in flight, to count the tokens OpenAI does not report
+        self._prompts: Dict[UUID, List[str]] = {}
+        self._started = time.perf_counter()
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any],
+                       run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        # Older langchain versions name the chain, newer ones give its import path as "id"
+        name = serialized.get("name") or (serialized.get("id") or [None])[-1]
+        if name not in STAGE_CHAINS:
+            return
+        span = trace.get_tracer(__name__).start_span("aip.stage") if trace is not None else None
+        with self._lock:
+            self._stages[run_id] = (time.perf_counter(), False, span)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], run_id: Optional[UUID] = None,
+                     parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            self.metrics.llm_calls += 1
+            self._prompts[run_id] = prompts
+            if parent_run_id in self._stages:
+                started, _, span = self._stages[parent_run_id]
+                self._stages[parent_run_id] = (started, True, span)
+
+    def on_llm_end(self, response: LLMResult, run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            prompts = self._prompts.pop(run_id, [])
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        if not usage:
+            # Streamed completions (and local models) report no usage
+            model_name = llm_output.get("model_name", "text-davinci-003")
+            usage = {
+                "prompt_tokens": sum(count_tokens(prompt, model_name) for prompt in prompts),
+                "completion_tokens": sum(count_tokens(generation.text, model_name)
+                                         for generations in response.generations for generation in generations),
+            }
+        with self._lock:
+            self.metrics.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.metrics.completion_tokens += usage.get("completion_tokens", 0)
+
+    def on_chain_end(self, outputs: Dict[str, Any], run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            stage_run = self._stages.pop(run_id, None)
+            if stage_run is None:
+                return
+            started, called_llm, span = stage_run
+            seconds = time.perf_counter() - started
+            stage = next(iter(outputs), "unknown")
+            self.metrics.stages.setdefault(stage, []).append(seconds)
+            # The LLM is not called at all when every prompt was answered by the cache
+            if not called_llm:
+                self.metrics.cache_hits += 1
+        if span is not None:
+            span.set_attribute("aip.stage", stage)
+            span.set_attribute("aip.cache_hit", not called_llm)
+            span.end()
+
+    def on_llm_error(self, error: BaseException, run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            self._prompts.pop(run_id, None)
+
+    def on_chain_error(self, error: BaseException, run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            stage_run = self._stages.pop(run_id, None)
+        if stage_run is not None and stage_run[2] is not None:
+            stage_run[2].record_exception(error)
+            stage_run[2].end()
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.metrics.retries += 1
+
+    def record_repairs(self, repairs: List[str]) -> None:
+        """Count the repairs :mod:`aip.repair` made and log what they were."""
+        if repairs:
+            logger.info("%s request repaired: %s", self.metrics.mode, "; ".join(repairs))
+        with self._lock:
+            self.metrics.repairs += len(repairs)
+
+    def record_cache_hit(self) -> None:
+        """Count a result served without running the chains (semantic cache)."""
+        with self._lock:
+            self.metrics.cache_hits += 1
+
+    def finish(self) -> RequestMetrics:
+        """Stop the request clock and add the request to the registry."""
+        self.metrics.elapsed = time.perf_counter() - self._started
+        if self.registry is not None:
+            self.registry.record(self.metrics)
+        logger.info("%s request: %.2fs, stages %s, %d prompt + %d completion tokens, %d cache hits, %d retries, "
+                    "%d repairs",
+                    self.metrics.mode, self.metrics.elapsed,
+                    {stage: [round(t, 3) for t in timings] for stage, timings in self.metrics.stages.items()},
+                    self.metrics.prompt_tokens, self.metrics.completion_tokens,
+                    self.metrics.cache_hits, self.metrics.retries, self.metrics.repairs)
+        return self.metrics
+
+
+def start_metrics_server(port: int, registry: MetricsRegistry = REGISTRY,
+                         host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``registry`` at ``http://host:port/metrics`` from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
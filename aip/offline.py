@@ -0,0 +1,102 @@
+"""Offline generation: build variations from the option lists without an LLM call.
+
+The first row is always the user's selection. The other rows swap the values
+of the fields being varied for other options of the same field, either sampled
+with a seeded RNG or enumerated in order, so the same seed always gives the
+same prompts. Polishing the rendered prompts with an LLM is optional and done
+in chunks that fit the model's context.
+"""
+import itertools
+import random
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from aip.fused import split_lines
+from aip.schema import Generator
+from aip.validate import render_prompts
+
+Row = Dict[str, str]
+
+POLISH_TEMPLATE = """
+Rewrite each of the following Midjourney prompts as a fluent comma-separated summary sentence. Keep the same elements, start each sentence with {framework} and end each sentence with " —ar {aspect_ratio}".
+{lines}
+Format: Bulleted markdown list with the title of "Suggested Prompts for Midjourney".
+"""
+# Prompts rewritten per polish call, about 1k tokens each way
+POLISH_CHUNK_SIZE = 20
+
+
+def _choices(generator: Generator, values: Mapping[str, str], vary: Iterable[str]) -> Dict[str, List[str]]:
+    """Options per field: the selected value first, then the remaining options if varied."""
+    vary = set(vary)
+    choices = {}
+    for field in generator.fields:
+        selected = values[field.name]
+        options = [selected]
+        if field.name in vary:
+            options += [option for option in field.options if option != selected]
+        choices[field.name] = options
+    return choices
+
+
+def _to_row(generator: Generator, combination: Sequence[str]) -> Row:
+    return {field.column_name: value for field, value in zip(generator.fields, combination)}
+
+
+def enumerate_rows(generator: Generator, values: Mapping[str, str], vary: Iterable[str],
+                   limit: int, allowed: Optional[Callable[[Row], bool]] = None) -> List[Row]:
+    """The first ``limit`` combinations of the varied fields, in option order."""
+    choices = _choices(generator, values, vary)
+    rows: Iterator[Row] = (_to_row(generator, combination)
+                           for combination in itertools.product(*choices.values()))
+    if allowed is not None:
+        rows = filter(allowed, rows)
+    return list(itertools.islice(rows, limit))
+
+
+def sample_rows(generator: Generator, values: Mapping[str, str], vary: Iterable[str],
+                count: int, seed: int = 0, allowed: Optional[Callable[[Row], bool]] = None,
+                max_attempts: int = 100) -> List[Row]:
+    """``count`` distinct random combinations of the varied fields.
+
+    ``allowed`` can reject combinations that do not make sense together. Fewer
+    rows are returned when the varied fields do not have enough distinct
+    allowed combinations.
+    """
+    rng = random.Random(seed)
+    choices = list(_choices(generator, values, vary).values())
+    first = tuple(options[0] for options in choices)
+    seen = {first}
+    rows = [_to_row(generator, first)]
+    attempts = 0
+    while len(rows) < count and attempts < count * max_attempts:
+        attempts += 1
+        combination = tuple(rng.choice(options) for options in choices)
+        if combination in seen:
+            continue
+        seen.add(combination)
+        row = _to_row(generator, combination)
+        if allowed is None or allowed(row):
+            rows.append(row)
+    return rows[:count]
+
+
+def polish_lines(lines: str, polish: Callable[[str, int], str],
+                 chunk_size: int = POLISH_CHUNK_SIZE) -> Tuple[str, int]:
+    """The prompt ``lines`` rewritten by ``polish`` in chunks of ``chunk_size`` prompts.
+
+    ``polish(lines, count)`` rewrites a bulleted list of ``count`` prompts. A
+    chunk that comes back with a different number of prompts keeps its
+    prompts as they were. Returns the polished list and the number of
+    prompts left unpolished.
+    """
+    prompts = split_lines(lines)
+    polished, kept = [], 0
+    for start in range(0, len(prompts), chunk_size):
+        chunk = prompts[start:start + chunk_size]
+        rewritten = split_lines(polish("\n".join(f"- {prompt}" for prompt in chunk), len(chunk)))
+        if len(rewritten) == len(chunk):
+            polished += rewritten
+        else:
+            polished += chunk
+            kept += len(chunk)
+    return render_prompts(polished), kept
@@ -0,0 +1,111 @@
+"""Regenerate selected rows of a result instead of the whole set."""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain.callbacks.manager import Callbacks
+from langchain.chains import LLMChain
+
+from aip.budget import copy_model, count_tokens, extend_prompt
+from aip.fused import RowParseError, parse_rows
+from aip.retry import ChainCall, chain_call
+from aip.shards import MAX_PARALLEL_SHARDS, SHARD_SIZE, row_key, split_rows, unseeded_prompt
+
+Row = Dict[str, str]
+
+AVOID_HINT = """
+These rows already exist. Every new variation must differ from all of them:
+{existing_rows}
+"""
+# Tokens of existing rows listed in one prompt; the rest are only deduplicated locally
+MAX_AVOID_TOKENS = 1000
+
+
+def regenerate_chain(rows_chain: LLMChain, seed_row: bool = False) -> LLMChain:
+    """Copy of the fused rows chain whose prompt lists the rows to avoid.
+
+    The selection usually is one of those rows, so it is only asked for as
+    the first variation with ``seed_row=True``.
+    """
+    prompt = rows_chain.prompt if seed_row else unseeded_prompt(rows_chain.prompt)
+    return copy_model(rows_chain, prompt=extend_prompt(prompt, AVOID_HINT, ["existing_rows"]))
+
+
+def avoid_inputs(inputs: Dict[str, Any], rows: Sequence[Row], count: int,
+                 max_tokens: int = MAX_AVOID_TOKENS) -> Dict[str, Any]:
+    """Inputs of the :func:`regenerate_chain` asking for ``count`` rows unlike ``rows``.
+
+    Only the first rows that fit in ``max_tokens`` are listed, so put the
+    ones that matter most first.
+    """
+    listed, tokens = [], 0
+    for row in rows:
+        text = json.dumps(row, ensure_ascii=False)
+        tokens += count_tokens(text) + 1
+        if tokens > max_tokens:
+            break
+        listed.append(text)
+    return {**inputs, "row_numbers": count, "existing_rows": "[" + ",\n".join(listed) + "]"}
+
+
+def new_rows(text: str, columns: Sequence[str], rows: Sequence[Row]) -> List[Row]:
+    """The rows parsed from ``text`` that do not repeat one of ``rows`` or each other."""
+    seen = {row_key(row) for row in rows}
+    fresh = []
+    for row in parse_rows(text, columns):
+        key = row_key(row)
+        if key not in seen:
+            seen.add(key)
+            fresh.append(row)
+    return fresh
+
+
+async def aregenerate_rows(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                           rows: Sequence[Row], indices: Sequence[int], shard_size: int = SHARD_SIZE,
+                           max_parallel: int = MAX_PARALLEL_SHARDS, callbacks: Callbacks = None,
+                           call: Optional[ChainCall] = None) -> List[Row]:
+    """Return ``rows`` with the rows at ``indices`` replaced by new variations.
+
+    The indices are regenerated in parallel chunks of ``shard_size`` rows,
+    like shards. Each call lists the rows it replaces first, then as many
+    other rows as fit in :data:`MAX_AVOID_TOKENS`. Returned rows that repeat
+    any existing or earlier new row are dropped; if too few are left, or a
+    chunk fails, the remaining indices keep their old row. ``call`` makes each
+    chunk's call (default: one attempt with ``callbacks``).
+    """
+    if not indices:
+        return list(rows)
+    chain = regenerate_chain(rows_chain)
+    call = call or chain_call(callbacks)
+    semaphore = asyncio.Semaphore(max_parallel)
+    chunks, start = [], 0
+    for size in split_rows(len(indices), shard_size):
+        chunks.append(indices[start:start + size])
+        start += size
+
+    async def run(chunk: Sequence[int]) -> List[Row]:
+        replaced = set(chunk)
+        avoid = [rows[i] for i in chunk] + [row for i, row in enumerate(rows) if i not in replaced]
+        async with semaphore:
+            output = await call(chain, avoid_inputs(inputs, avoid, len(chunk)))
+        return new_rows(output, columns, rows)
+
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+    if all(isinstance(fresh, BaseException) for fresh in results):
+        raise RowParseError(f"All {len(chunks)} regeneration calls failed: {results[0]}")
+    updated = list(rows)
+    seen = {row_key(row) for row in rows}
+    for chunk, fresh in zip(chunks, results):
+        if isinstance(fresh, BaseException):
+            continue
+        fresh = [row for row in fresh if row_key(row) not in seen]
+        for index, row in zip(chunk, fresh):
+            seen.add(row_key(row))
+            updated[index] = row
+    return updated
+
+
+def regenerate_rows(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                    rows: Sequence[Row], indices: Sequence[int], **kwargs: Any) -> List[Row]:
+    """Blocking wrapper around :func:`aregenerate_rows` for the Streamlit apps."""
+    return asyncio.run(aregenerate_rows(rows_chain, inputs, columns, rows, indices, **kwargs))
@@ -0,0 +1,180 @@
+"""Targeted repair of a malformed or truncated table and prompt lines.
+
+Instead of running both stages again when :mod:`aip.validate` finds a
+problem, only the broken part is requested:
+
+- a table cut off mid-row is continued from where it stopped,
+- missing table rows, and missing fused rows, are fetched with one fused-row
+  call that lists the existing rows to avoid,
+- prompt lines that are missing or cut off are written for their rows only,
+- a wrong framework prefix or ``—ar`` suffix is fixed locally.
+
+Only a table whose header lacks columns is generated again, by the table
+stage alone. Each function returns the repaired output and a list of the
+repairs made, for logging and metrics; a repair call that fails keeps what
+was already there and is reported as a repair too. The async functions take
+an optional ``call`` that makes each LLM call, so callers with their own
+rate limit and retries (``BatchRunner._call``) use them for the repair calls
+as well.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.callbacks.manager import Callbacks
+from langchain.chains import LLMChain
+
+from aip.budget import copy_model, extend_prompt
+from aip.chains import Chains
+from aip.fused import format_line, render_table
+from aip.regenerate import avoid_inputs, new_rows, regenerate_chain
+from aip.retry import ChainCall, chain_call
+from aip.schema import Generator
+from aip.validate import check_lines, check_table, expected_columns, render_prompts
+
+Row = Dict[str, str]
+
+
+def continuation_chain(chain: LLMChain) -> LLMChain:
+    """Copy of ``chain`` whose prompt ends with the partial output to continue."""
+    return copy_model(chain, prompt=extend_prompt(chain.prompt, "{partial}", ["partial"]))
+
+
+async def afill_rows(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                     rows: Sequence[Row], total_rows: int, callbacks: Callbacks = None,
+                     call: Optional[ChainCall] = None) -> List[Row]:
+    """``rows`` topped up to ``total_rows`` with one call for the missing rows only.
+
+    If that call fails or returns nothing usable, ``rows`` come back as they are.
+    """
+    missing = total_rows - len(rows)
+    if missing <= 0:
+        return list(rows[:total_rows])
+    call = call or chain_call(callbacks)
+    chain = regenerate_chain(rows_chain, seed_row=not rows)
+    try:
+        fresh = new_rows(await call(chain, avoid_inputs(inputs, rows, missing)), columns, rows)
+    except Exception:
+        fresh = []
+    return list(rows) + fresh[:missing]
+
+
+def _fetched_repair(fetched: int, missing: int) -> str:
+    """The repair note for ``fetched`` of ``missing`` rows topped up."""
+    if not fetched:
+        return f"{missing} missing rows could not be fetched"
+    return f"{fetched} of {missing} missing rows fetched"
+
+
+async def arepair_rows(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                       rows: Sequence[Row], callbacks: Callbacks = None,
+                       call: Optional[ChainCall] = None) -> Tuple[List[Row], List[str]]:
+    """Return the fused ``rows`` cut or topped up to ``row_numbers``, and the repairs made."""
+    row_numbers = int(inputs["row_numbers"])
+    if len(rows) > row_numbers:
+        return list(rows[:row_numbers]), [f"{len(rows) - row_numbers} extra rows dropped"]
+    if len(rows) == row_numbers:
+        return list(rows), []
+    filled = await afill_rows(rows_chain, inputs, columns, rows, row_numbers, callbacks, call)
+    return filled, [_fetched_repair(len(filled) - len(rows), row_numbers - len(rows))]
+
+
+async def arepair_table(chains: Chains, generator: Generator, inputs: Dict[str, Any], table: str,
+                        callbacks: Callbacks = None, call: Optional[ChainCall] = None) -> Tuple[str, List[str]]:
+    """Return ``table`` checked and repaired, and the repairs made.
+
+    A valid table is returned unchanged. Otherwise the table is rebuilt from
+    its complete rows after the missing ones were fetched. A repair call that
+    fails leaves the table as it was before that step.
+    """
+    row_numbers = int(inputs["row_numbers"])
+    expected = expected_columns(generator, inputs)
+    call = call or chain_call(callbacks)
+    repairs = []
+    check = check_table(table, generator.columns, expected, row_numbers)
+    if check.ok:
+        return table, repairs
+    if check.missing_columns:
+        # Rows with the wrong columns can not be completed, so only the table stage runs again
+        try:
+            table = await call(chains.table, inputs)
+        except Exception:
+            repairs.append("table could not be regenerated")
+            return table, repairs
+        check = check_table(table, generator.columns, expected, row_numbers)
+        repairs.append("table regenerated")
+    # A cut-off row past the requested ones is just dropped below
+    if check.truncated and check.missing_rows and not check.missing_columns:
+        try:
+            table += await call(continuation_chain(chains.table), {**inputs, "partial": table})
+        except Exception:
+            repairs.append("table could not be continued")
+        else:
+            check = check_table(table, generator.columns, expected, row_numbers)
+            repairs.append("table continued")
+    if check.ok:
+        return table, repairs
+    rows = check.rows
+    if check.missing_rows:
+        rows = await afill_rows(chains.rows, inputs, generator.columns, rows, row_numbers, call=call)
+        repairs.append(_fetched_repair(len(rows) - len(check.rows), check.missing_rows))
+    if check.truncated and not check.missing_rows:
+        repairs.append("cut-off row dropped")
+    if check.extra_rows:
+        repairs.append(f"{check.extra_rows} extra rows dropped")
+    if not rows:
+        return table, repairs
+    return render_table(rows, generator.columns), repairs
+
+
+async def arepair_lines(chains: Chains, generator: Generator, inputs: Dict[str, Any], rows: Sequence[Row],
+                        lines: str, callbacks: Callbacks = None,
+                        call: Optional[ChainCall] = None) -> Tuple[str, List[str]]:
+    """Return ``lines`` with one valid prompt per row of the table, and the repairs made.
+
+    Missing and cut-off prompts are requested for their rows only, and
+    formatted locally if that call fails or does not return them either.
+    """
+    framework, aspect_ratio = inputs["framework"], inputs["aspect_ratio"]
+    check = check_lines(lines, len(rows), framework, aspect_ratio)
+    if check.ok:
+        return lines, []
+    repairs = []
+    if check.fixed:
+        repairs.append(f"{check.fixed} prompts reformatted")
+    if check.extra_lines:
+        repairs.append(f"{check.extra_lines} extra prompts dropped")
+    prompts = check.prompts
+    missing = check.missing
+    if missing:
+        subset = [rows[i] for i in missing]
+        call = call or chain_call(callbacks)
+        try:
+            output = await call(chains.line, {**inputs, "table": render_table(subset, generator.columns)})
+        except Exception:
+            redone = [""] * len(missing)
+            repairs.append(f"{len(missing)} missing prompts formatted locally")
+        else:
+            redone = check_lines(output, len(subset), framework, aspect_ratio).prompts
+            repairs.append(f"{len(missing)} missing prompts written")
+        for i, prompt in zip(missing, redone):
+            prompts[i] = prompt or format_line(rows[i], framework, aspect_ratio)
+    return render_prompts(prompts), repairs
+
+
+def repair_table(chains: Chains, generator: Generator, inputs: Dict[str, Any], table: str,
+                 callbacks: Callbacks = None, call: Optional[ChainCall] = None) -> Tuple[str, List[str]]:
+    """Blocking wrapper around :func:`arepair_table` for the Streamlit apps."""
+    return asyncio.run(arepair_table(chains, generator, inputs, table, callbacks, call))
+
+
+def repair_lines(chains: Chains, generator: Generator, inputs: Dict[str, Any], rows: Sequence[Row],
+                 lines: str, callbacks: Callbacks = None, call: Optional[ChainCall] = None) -> Tuple[str, List[str]]:
+    """Blocking wrapper around :func:`arepair_lines` for the Streamlit apps."""
+    return asyncio.run(arepair_lines(chains, generator, inputs, rows, lines, callbacks, call))
+
+
+def repair_rows(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                rows: Sequence[Row], callbacks: Callbacks = None,
+                call: Optional[ChainCall] = None) -> Tuple[List[Row], List[str]]:
+    """Blocking wrapper around :func:`arepair_rows` for the Streamlit apps."""
+    return asyncio.run(arepair_rows(rows_chain, inputs, columns, rows, callbacks, call))
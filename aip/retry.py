@@ -0,0 +1,79 @@
+"""LLM calls retried with exponential backoff, each retry reported to the caller.
+
+The OpenAI client retries failed requests on its own, out of sight of the
+request metrics. The app, the API server and the batch runner build their
+LLMs with ``max_retries=1`` and retry here instead, so every retry is counted
+by :meth:`aip.metrics.MetricsHandler.record_retry`.
+"""
+import asyncio
+import functools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain.callbacks.manager import Callbacks
+from langchain.chains import LLMChain
+
+from aip.budget import ContextOverflowError
+
+RETRIES = 3
+BACKOFF = 1.0
+# Failures that would only repeat on the next attempt
+NOT_RETRIED = (ContextOverflowError,)
+
+# Makes one LLM call of a chain and returns its output text
+ChainCall = Callable[[LLMChain, Dict[str, Any]], Awaitable[str]]
+
+
+def retry_delay(attempt: int, backoff: float = BACKOFF) -> float:
+    """Seconds to wait after failed ``attempt`` (0-based), with jitter."""
+    return backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+
+
+async def acall_chain(chain: LLMChain, inputs: Dict[str, Any], callbacks: Callbacks = None, retries: int = 0,
+                      backoff: float = BACKOFF, on_retry: Optional[Callable[[], None]] = None,
+                      before: Optional[Callable[[], Awaitable[None]]] = None) -> str:
+    """Call ``chain`` and return its output, retrying failed calls ``retries`` times.
+
+    ``on_retry`` is called before every retry and ``before`` is awaited
+    before every attempt, e.g. to wait for a rate limit.
+    """
+    for attempt in range(retries + 1):
+        if before is not None:
+            await before()
+        try:
+            return (await chain.acall(inputs, callbacks=callbacks))[chain.output_key]
+        except NOT_RETRIED:
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            if on_retry is not None:
+                on_retry()
+            await asyncio.sleep(retry_delay(attempt, backoff))
+    raise AssertionError("unreachable")
+
+
+def call_chain(chain: LLMChain, inputs: Dict[str, Any], callbacks: Callbacks = None, retries: int = 0,
+               backoff: float = BACKOFF, on_retry: Optional[Callable[[], None]] = None) -> str:
+    """Blocking :func:`acall_chain` for the Streamlit apps."""
+    for attempt in range(retries + 1):
+        try:
+            return chain(inputs, callbacks=callbacks)[chain.output_key]
+        except NOT_RETRIED:
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            if on_retry is not None:
+                on_retry()
+            time.sleep(retry_delay(attempt, backoff))
+    raise AssertionError("unreachable")
+
+
+def chain_call(callbacks: Callbacks = None, retries: int = 0, backoff: float = BACKOFF,
+               on_retry: Optional[Callable[[], None]] = None,
+               before: Optional[Callable[[], Awaitable[None]]] = None) -> ChainCall:
+    """A :data:`ChainCall` running :func:`acall_chain` with these settings."""
+    return functools.partial(acall_chain, callbacks=callbacks, retries=retries, backoff=backoff,
+                             on_retry=on_retry, before=before)
@@ -0,0 +1,117 @@
+"""Declarative description of a prompt generator.
+
+A :class:`Generator` lists its input fields with their options, the table and
+fused-row templates and the framework. The Streamlit app, the chains and the
+batch runner are all built from this one definition, so a new generator is a
+new ``Generator(...)`` rather than a copy of an app script.
+"""
+import string
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Set, Tuple
+
+# langchain is only imported once a prompt is needed, so the apps start without it
+if TYPE_CHECKING:
+    from langchain.prompts import PromptTemplate
+
+CUSTOM_OPTION = "Custom"
+ASPECT_RATIO_OPTIONS = ("16:9", "4:3", "1:1", "21:9", "3:2")
+DEFAULT_ROW_NUMBERS = 5
+
+LINE_TEMPLATE = """
+Please write a comma-separated summary sentence for each row of the following table.
+{table}
+Prepend each sentence with {framework} and append each sentence with " —ar {aspect_ratio}".
+Format: Bulleted markdown list with the title of "Suggested Prompts for Midjourney".
+"""
+
+
+def template_variables(template: str) -> Set[str]:
+    """The ``{variables}`` of an f-string style prompt template."""
+    return {name for _, name, _, _ in string.Formatter().parse(template) if name is not None}
+
+
+@dataclass(frozen=True)
+class Field:
+    """One template variable, shown as a selectbox with a "Custom" escape hatch."""
+
+    name: str
+    label: str
+    options: Tuple[str, ...]
+    # Which of the two input columns the selectbox is placed in (0 = left, 1 = right)
+    panel: int = 0
+    # Heading of the table column, when it differs from the selectbox label
+    column: Optional[str] = None
+
+    @property
+    def column_name(self) -> str:
+        return self.column or self.label
+
+
+@dataclass(frozen=True)
+class Generator:
+    """A prompt generator: its fields, templates and framework."""
+
+    name: str
+    title: str
+    fields: Tuple[Field, ...]
+    table_template: str
+    rows_template: str
+    # Either a fixed framework, or a list of options the user picks from
+    framework: Optional[str] = None
+    framework_options: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if (self.framework is None) == (not self.framework_options):
+            raise ValueError(f"{self.name}: set exactly one of framework or framework_options")
+        expected = {field.name for field in self.fields} | {"framework", "row_numbers"}
+        for template_name in ("table_template", "rows_template"):
+            variables = template_variables(getattr(self, template_name))
+            if variables != expected:
+                raise ValueError(
+                    f"{self.name}.{template_name} variables do not match the fields: "
+                    f"missing {sorted(expected - variables)}, unknown {sorted(variables - expected)}")
+
+    # The prompts are compiled once per generator and shared by every rerun and session
+    @cached_property
+    def table_prompt(self) -> "PromptTemplate":
+        from langchain.prompts import PromptTemplate
+
+        return PromptTemplate.from_template(self.table_template)
+
+    @cached_property
+    def rows_prompt(self) -> "PromptTemplate":
+        from langchain.prompts import PromptTemplate
+
+        return PromptTemplate.from_template(self.rows_template)
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.column_name for field in self.fields]
+
+    @property
+    def input_variables(self) -> List[str]:
+        """Every input the table -> line pipeline needs."""
+        return [field.name for field in self.fields] + ["framework", "aspect_ratio", "row_numbers"]
+
+    def default_inputs(self) -> Dict[str, Any]:
+        """Input values used when a caller does not provide one."""
+        defaults: Dict[str, Any] = {"aspect_ratio": ASPECT_RATIO_OPTIONS[0],
+                                    "row_numbers": DEFAULT_ROW_NUMBERS}
+        if self.framework is not None:
+            defaults["framework"] = self.framework
+        return defaults
+
+    def validate_inputs(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        """Fill in defaults and check that every input variable has a value.
+
+        ``None`` and blank strings count as no value: inputs with a default get
+        the default, the others are reported as missing.
+        """
+        defaults = self.default_inputs()
+        inputs = {**defaults, **{key: value for key, value in values.items()
+                                 if value is not None and not (isinstance(value, str) and not value.strip())}}
+        missing = [name for name in self.input_variables if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing input values: {', '.join(missing)}")
+        return inputs
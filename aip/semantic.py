@@ -0,0 +1,201 @@
+"""Near-duplicate detection with local embeddings and NumPy cosine search.
+
+Texts are embedded with hashed word and character-trigram features, which
+need nothing but NumPy. Tokens with digits weigh the most, so "Portra 400" and
+"Portra 800" stay apart. Set ``AIP_EMBEDDING_MODEL`` to a sentence-transformers
+model (``all-MiniLM-L6-v2``) to embed with it on the CPU instead, and tune the
+thresholds for it. Every vector is unit length, so cosine similarity is a dot
+product.
+
+:class:`SemanticCache` returns an earlier result when only custom free-text
+field values differ slightly ("a golden retriever on the beach" vs "Golden
+retriever on a beach"); values picked from the option lists must match
+exactly. :func:`dedupe_rows` and :func:`dedupe_table` drop generated rows
+whose every column nearly repeats an earlier row of the same set before they
+are turned into prompts.
+
+Both thresholds sit above the similarity of the closest distinct options
+(0.95, between lenses that differ only by make, e.g. "Nikon Nikkor-S 50mm
+f/1.4" vs "Pentax Super-Takumar 50mm f/1.4"), so only rewordings, reorderings
+and changes of stop words, case or punctuation match.
+"""
+import json
+import os
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aip.fused import RowParseError, parse_table, render_table
+from aip.schema import Generator
+
+Row = Dict[str, str]
+
+EMBEDDING_MODEL = os.environ.get("AIP_EMBEDDING_MODEL", "")
+HASH_DIMENSIONS = 256
+WORD_WEIGHT = 1.0
+NUMBER_WEIGHT = 3.0
+TRIGRAM_WEIGHT = 0.2
+# A request matches when every one of its custom fields is at least this similar
+SEMANTIC_THRESHOLD = float(os.environ.get("AIP_SEMANTIC_THRESHOLD", "0.96"))
+# A row is a duplicate when every one of its columns is at least this similar
+ROW_DUPLICATE_THRESHOLD = float(os.environ.get("AIP_ROW_DUPLICATE_THRESHOLD", "0.96"))
+SEMANTIC_MAX_ENTRIES = 1000
+STOP_WORDS = frozenset({"a", "an", "and", "at", "for", "in", "of", "on", "the", "to", "with"})
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case words without punctuation and stop words; empty values all become "none"."""
+    words = re.findall(r"[a-z0-9]+", str(text).casefold())
+    return " ".join([word for word in words if word not in STOP_WORDS] or words) or "none"
+
+
+def _features(text: str) -> List[Tuple[str, float]]:
+    padded = f" {text} "
+    words = [(word, NUMBER_WEIGHT if any(c.isdigit() for c in word) else WORD_WEIGHT) for word in text.split()]
+    return words + [(padded[j:j + 3], TRIGRAM_WEIGHT) for j in range(len(padded) - 2)]
+
+
+def hashed_embeddings(texts: Sequence[str]) -> np.ndarray:
+    """Unit vectors of hashed, weighted word and character-trigram counts."""
+    vectors = np.zeros((len(texts), HASH_DIMENSIONS), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for feature, weight in _features(text):
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vectors[i, digest % HASH_DIMENSIONS] += weight if digest & 0x80000000 else -weight
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class Embedder:
+    """Embed short texts as unit vectors, with a sentence-transformers model if one is named."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL) -> None:
+        self.model = None
+        if model_name:
+            from sentence_transformers import SentenceTransformer
+
+            self.model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        texts = [normalize_text(text) for text in texts]
+        if self.model is None:
+            return hashed_embeddings(texts)
+        return np.asarray(self.model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+@lru_cache(maxsize=None)
+def default_embedder() -> Embedder:
+    return Embedder()
+
+
+def dedupe_rows(rows: Sequence[Row], threshold: float = ROW_DUPLICATE_THRESHOLD,
+                embedder: Optional[Embedder] = None) -> List[Row]:
+    """``rows`` without the rows whose every column reaches ``threshold`` against an earlier kept row.
+
+    Rows are compared column by column, so a row that changes a single
+    value (another mood, another lens) is kept.
+    """
+    if len(rows) < 2:
+        return list(rows)
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    values = [[str(row.get(column, "")) for column in columns] for row in rows]
+    # Generated sets repeat most values, so each distinct value is embedded once
+    texts = list(dict.fromkeys(value for row_values in values for value in row_values))
+    index = {text: i for i, text in enumerate(texts)}
+    # (columns, rows, dimensions) value vectors
+    vectors = (embedder or default_embedder()).embed(texts)[[[index[row_values[c]] for row_values in values]
+                                                             for c in range(len(columns))]]
+    # Row-by-row similarity of the least similar column
+    similarity = np.matmul(vectors, vectors.transpose(0, 2, 1)).min(axis=0)
+    kept: List[int] = []
+    for i in range(len(rows)):
+        if not kept or similarity[i, kept].max() < threshold:
+            kept.append(i)
+    return [rows[i] for i in kept]
+
+
+def dedupe_table(table: str, columns: Sequence[str], threshold: float = ROW_DUPLICATE_THRESHOLD) -> str:
+    """The markdown ``table`` without near-duplicate rows, unchanged if it has none or can not be read."""
+    try:
+        rows = parse_table(table, columns)
+    except RowParseError:
+        return table
+    unique = dedupe_rows(rows, threshold)
+    return table if len(unique) == len(rows) else render_table(unique, columns)
+
+
+class SemanticCache:
+    """In-memory results found again for near-identical inputs.
+
+    ``exact`` inputs (generator, mode, framework, row count, ...) must match
+    exactly. ``fuzzy`` inputs (the custom field values) match when the
+    embeddings of every field reach the threshold; the least similar field is
+    the score. Without fuzzy inputs the newest exact match scores 1.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_THRESHOLD, max_entries: int = SEMANTIC_MAX_ENTRIES,
+                 embedder: Optional[Embedder] = None) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedder = embedder or default_embedder()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+
+    @staticmethod
+    def _partition(exact: Mapping[str, Any], fuzzy: Mapping[str, Any]) -> str:
+        return json.dumps([sorted(exact.items()), sorted(fuzzy)], sort_keys=True, default=str)
+
+    def _vectors(self, fuzzy: Mapping[str, Any]) -> np.ndarray:
+        return self.embedder.embed([str(fuzzy[name]) for name in sorted(fuzzy)])
+
+    def lookup(self, exact: Mapping[str, Any], fuzzy: Mapping[str, Any]) -> Optional[Tuple[float, Any]]:
+        """The most similar stored result and its similarity, if above the threshold."""
+        vectors = self._vectors(fuzzy)
+        with self._lock:
+            stored, results = self._partitions.get(self._partition(exact, fuzzy), (None, []))
+            if stored is not None and not fuzzy:
+                # Every input is exact, so every stored entry is identical to the request
+                self.hits += 1
+                return 1.0, results[-1]
+            if stored is not None:
+                # (entries, fields) similarities, scored by each entry's least similar field
+                scores = np.einsum("nfd,fd->nf", stored, vectors).min(axis=1)
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return float(scores[best]), results[best]
+            self.misses += 1
+        return None
+
+    def update(self, exact: Mapping[str, Any], fuzzy: Mapping[str, Any], result: Any) -> None:
+        """Store ``result``, dropping the oldest entry of a full partition."""
+        vectors = self._vectors(fuzzy)
+        key = self._partition(exact, fuzzy)
+        with self._lock:
+            stored, results = self._partitions.get(key, (np.empty((0, *vectors.shape), dtype=np.float32), []))
+            stored = np.concatenate([stored, vectors[None]])[-self.max_entries:]
+            results = (results + [result])[-self.max_entries:]
+            self._partitions[key] = (stored, results)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = sum(len(results) for _, results in self._partitions.values())
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+def cache_inputs(generator: Generator, mode: str, inputs: Mapping[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """The ``(exact, fuzzy)`` :class:`SemanticCache` inputs of a request.
+
+    Only custom field values, the ones not in the field's options, are
+    compared by similarity. Option values, the generator, mode, framework,
+    aspect ratio and row count must be identical.
+    """
+    fuzzy = {field.name: inputs[field.name] for field in generator.fields if inputs[field.name] not in field.options}
+    exact = {name: value for name, value in inputs.items() if name not in fuzzy}
+    return {**exact, "generator": generator.name, "mode": mode}, fuzzy
@@ -0,0 +1,263 @@
+"""Headless JSON API for the prompt generators.
+
+Serves every generator in :data:`aip.generators.GENERATORS` over HTTP::
+
+    OPENAI_API_KEY=sk-... python -m aip.server --port 8080
+
+    curl -X POST localhost:8080/generate/photo -d '{"subject": "Dog", "film_type": "Kodak Gold 400",
+        "color_pallet": "Black and white", "lens": "Canon FD 50mm f/1.4", "lighting": "Natural light",
+        "shot_type": "Close-up", "styling": "Street", "ambiance": "Mysty", "location": "New York",
+        "fine_tuning": "Fine-grain", "clothing_type": "None", "clothing_color": "None", "row_numbers": 3}'
+
+Every field of the generator needs a value (``GET /generators`` lists them
+with their options); ``framework``, ``aspect_ratio`` and ``row_numbers`` have
+defaults. All OpenAI calls share one pooled ``aiohttp`` session, and concurrent requests
+with identical inputs are coalesced into a single upstream call whose result
+is returned to every caller. Unless ``--no-cache`` is given, a request whose
+field values are nearly identical to an earlier one gets the earlier result
+(``"semantic_hit"`` holds the similarity). Generated sets are appended to the
+history database (:mod:`aip.history`) unless ``--no-history`` is given.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+import aiohttp
+import langchain
+import openai
+from aiohttp import web
+
+from aip.backends import DEFAULT_CREATIVE_BACKEND, DEFAULT_FORMATTING_BACKEND, requires_api_key
+from aip.cache import DEFAULT_CACHE_PATH, SQLiteLRUCache
+from aip.chains import Chains, build_chains
+from aip.fused import RowParseError, parse_rows, parse_table, render_lines
+from aip.generators import GENERATORS
+from aip.history import DEFAULT_HISTORY_PATH, ResultStore, backend_label
+from aip.metrics import REGISTRY, MetricsHandler
+from aip.repair import arepair_lines, arepair_rows, arepair_table
+from aip.retry import RETRIES, chain_call
+from aip.schema import Generator
+from aip.semantic import SemanticCache, cache_inputs, dedupe_rows, dedupe_table
+from aip.shards import agenerate_sharded
+
+MODES = ("classic", "fused", "sharded")
+MAX_ROWS = {"classic": 10, "fused": 10, "sharded": 200}
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(*parts: Any) -> str:
+    """Stable hash of a JSON-serializable request description."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class Coalescer:
+    """Share one in-flight call between concurrent callers with the same key."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await ``call()``, or the identical call already in flight for ``key``.
+
+        Returns ``(result, coalesced)``. A caller that disconnects does not
+        cancel the shared call for the others.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            REGISTRY.inc("aip_coalesced_total")
+            return await asyncio.shield(future), True
+        future = asyncio.ensure_future(call())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future), False
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class PromptService:
+    """aiohttp handlers running the chains of every generator."""
+
+    def __init__(self, api_key: str, use_cache: bool = True, pool_size: int = 32,
+                 history: Optional[ResultStore] = None, **llm_kwargs: Any) -> None:
+        # Retries happen in _run, where the request metrics count them
+        llm_kwargs = {"max_retries": 1, **llm_kwargs}
+        self.chains: Dict[str, Chains] = {
+            name: build_chains(api_key, generator, cache=use_cache, **llm_kwargs)
+            for name, generator in GENERATORS.items()
+        }
+        self.pool_size = pool_size
+        self.coalescer = Coalescer()
+        self.semantic_cache = SemanticCache() if use_cache else None
+        self.history = history
+        self.creative_backend = llm_kwargs.get("creative_backend") or DEFAULT_CREATIVE_BACKEND
+        self.formatting_backend = llm_kwargs.get("formatting_backend") or DEFAULT_FORMATTING_BACKEND
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self, app: web.Application) -> None:
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+
+    async def close(self, app: web.Application) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.close)
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/metrics", self.metrics)
+        app.router.add_get("/generators", self.generators)
+        app.router.add_post("/generate/{generator}", self.generate)
+        return app
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "inflight": len(self.coalescer)})
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), content_type="text/plain")
+
+    async def generators(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            name: {
+                "title": generator.title,
+                "input_variables": generator.input_variables,
+                "defaults": generator.default_inputs(),
+                "options": {field.name: list(field.options) for field in generator.fields},
+            }
+            for name, generator in GENERATORS.items()
+        })
+
+    async def generate(self, request: web.Request) -> web.Response:
+        name = request.match_info["generator"]
+        if name not in GENERATORS:
+            raise web.HTTPNotFound(text=json.dumps({"error": f"Unknown generator {name!r}"}),
+                                   content_type="application/json")
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "The request body must be a JSON object"}, status=400)
+        if not isinstance(body, dict):
+            return web.json_response({"error": "The request body must be a JSON object"}, status=400)
+
+        generator = GENERATORS[name]
+        mode = body.pop("mode", "classic")
+        if mode not in MODES:
+            return web.json_response({"error": f"mode must be one of {', '.join(MODES)}"}, status=400)
+        try:
+            inputs = generator.validate_inputs(body)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        try:
+            inputs["row_numbers"] = int(inputs["row_numbers"])
+        except (TypeError, ValueError):
+            return web.json_response({"error": f"row_numbers must be an integer, got {inputs['row_numbers']!r}"},
+                                     status=400)
+        if not 1 <= inputs["row_numbers"] <= MAX_ROWS[mode]:
+            return web.json_response(
+                {"error": f"row_numbers must be between 1 and {MAX_ROWS[mode]} in {mode} mode"}, status=400)
+
+        if self.semantic_cache is not None:
+            hit = self.semantic_cache.lookup(*cache_inputs(generator, mode, inputs))
+            if hit is not None:
+                REGISTRY.inc("aip_semantic_hits_total")
+                similarity, result = hit
+                return web.json_response({**result, "inputs": inputs, "coalesced": False,
+                                          "semantic_hit": round(similarity, 3)})
+
+        # The OpenAI client picks its aiohttp session from a context variable
+        openai.aiosession.set(self.session)
+        try:
+            result, coalesced = await self.coalescer.run(
+                request_key(name, mode, inputs), lambda: self._run(generator, mode, inputs))
+        except RowParseError as e:
+            return web.json_response({"error": f"Could not read the generated rows: {e}"}, status=502)
+        except Exception as e:
+            logger.exception("%s request failed", name)
+            return web.json_response({"error": f"{type(e).__name__}: {e}"}, status=502)
+        if not coalesced:
+            if self.semantic_cache is not None:
+                self.semantic_cache.update(*cache_inputs(generator, mode, inputs), result)
+            if self.history is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self._record, generator, mode, result)
+        return web.json_response({**result, "coalesced": coalesced})
+
+    def _record(self, generator: Generator, mode: str, result: Dict[str, Any]) -> None:
+        specs = [self.creative_backend] + ([self.formatting_backend] if mode == "classic" else [])
+        self.history.record(generator.name, f"api {mode}", result["inputs"], result["lines"],
+                            table=result.get("table"), rows=result.get("rows"), metrics=result["metrics"],
+                            model=backend_label(*specs))
+
+    async def _run(self, generator: Generator, mode: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        chains = self.chains[generator.name]
+        handler = MetricsHandler(f"api {mode}")
+        call = chain_call([handler], retries=RETRIES, on_retry=handler.record_retry)
+        result: Dict[str, Any] = {"generator": generator.name, "mode": mode, "inputs": inputs}
+        try:
+            if mode == "sharded":
+                rows = await agenerate_sharded(chains.rows, inputs, generator.columns,
+                                               inputs["row_numbers"], call=call)
+                result["rows"] = rows
+                result["lines"] = render_lines(rows, inputs["framework"], inputs["aspect_ratio"])
+            elif mode == "fused":
+                rows = dedupe_rows(parse_rows(await call(chains.rows, inputs), generator.columns))
+                rows, repairs = await arepair_rows(chains.rows, inputs, generator.columns, rows, call=call)
+                handler.record_repairs(repairs)
+                result["rows"] = rows
+                result["lines"] = render_lines(rows, inputs["framework"], inputs["aspect_ratio"])
+            else:
+                table = await call(chains.table, inputs)
+                table, repairs = await arepair_table(chains, generator, inputs,
+                                                     dedupe_table(table, generator.columns), call=call)
+                lines = await call(chains.line, {**inputs, "table": table})
+                try:
+                    rows = parse_table(table, generator.columns)
+                except RowParseError:
+                    rows = []
+                if rows:
+                    lines, line_repairs = await arepair_lines(chains, generator, inputs, rows, lines, call=call)
+                    repairs += line_repairs
+                handler.record_repairs(repairs)
+                result["table"], result["lines"] = table, lines
+        finally:
+            metrics = handler.finish()
+        result["metrics"] = asdict(metrics)
+        return result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pool-size", type=int, default=32, help="maximum open connections to the LLM API")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the response cache")
+    parser.add_argument("--no-history", action="store_true", help="do not store the generated sets")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"),
+                        help="OpenAI API key (defaults to $OPENAI_API_KEY)")
+    parser.add_argument("--creative-backend", default=DEFAULT_CREATIVE_BACKEND,
+                        help="backend of the table and row stages: openai[:model], llamacpp:<model.gguf> or fake")
+    parser.add_argument("--formatting-backend", default=DEFAULT_FORMATTING_BACKEND,
+                        help="backend of the prompt line and polish stages")
+    args = parser.parse_args(argv)
+
+    if not args.api_key and requires_api_key(args.creative_backend, args.formatting_backend):
+        parser.error("an OpenAI API key is required (--api-key or $OPENAI_API_KEY)")
+    logging.basicConfig(level=logging.INFO)
+    if not args.no_cache:
+        langchain.llm_cache = SQLiteLRUCache(DEFAULT_CACHE_PATH)
+    history = None if args.no_history else ResultStore(DEFAULT_HISTORY_PATH)
+    service = PromptService(args.api_key, use_cache=not args.no_cache, pool_size=args.pool_size, history=history,
+                            creative_backend=args.creative_backend, formatting_backend=args.formatting_backend)
+    web.run_app(service.application(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Generate large row counts as parallel shard calls of the fused row prompt."""
+import asyncio
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.callbacks.manager import Callbacks
+from langchain.chains import LLMChain
+from langchain.prompts.base import BasePromptTemplate
+
+from aip.budget import CompactPrompt, copy_model, extend_prompt
+from aip.fused import RowParseError, parse_rows
+from aip.retry import ChainCall, chain_call
+from aip.semantic import dedupe_rows
+
+SHARD_SIZE = 5
+MAX_PARALLEL_SHARDS = 16
+SHARD_HINT = """
+This is batch {shard} of {shards} (seed {seed}). Give this batch its own creative direction so that its variations do not overlap with the variations of the other batches.
+"""
+# Only the first shard returns the selection itself; the others would each repeat it
+UNSEEDED_HINT = """
+Another batch already returned the selected values above as a variation. Do not include that variation: every variation of this batch must differ from it.
+"""
+
+
+def split_rows(total_rows: int, shard_size: int = SHARD_SIZE) -> List[int]:
+    """Split ``total_rows`` into shard sizes of at most ``shard_size``."""
+    full, rest = divmod(total_rows, shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+
+def unseeded_prompt(prompt: BasePromptTemplate) -> BasePromptTemplate:
+    """The fused rows ``prompt`` told not to return the selected values as a row."""
+    if isinstance(prompt, CompactPrompt):
+        prompt = copy_model(prompt, seed_row=False)
+    return extend_prompt(prompt, UNSEEDED_HINT, [])
+
+
+def shard_chain(rows_chain: LLMChain, seed_row: bool = True) -> LLMChain:
+    """Copy of the fused rows chain whose prompt ends with a per-shard hint.
+
+    With ``seed_row=False`` the shard is asked not to repeat the selection,
+    which the first shard already returns.
+    """
+    prompt = rows_chain.prompt if seed_row else unseeded_prompt(rows_chain.prompt)
+    return copy_model(rows_chain, prompt=extend_prompt(prompt, SHARD_HINT, ["shard", "shards", "seed"]))
+
+
+def row_key(row: Dict[str, str]) -> Tuple[str, ...]:
+    """Identity of a row for deduplication, ignoring case and spacing."""
+    return tuple(" ".join(value.lower().split()) for value in row.values())
+
+
+def merge_rows(shard_rows: Sequence[Sequence[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """Concatenate shard results, dropping rows that repeat an earlier row."""
+    seen = set()
+    merged = []
+    for rows in shard_rows:
+        for row in rows:
+            key = row_key(row)
+            if key not in seen:
+                seen.add(key)
+                merged.append(row)
+    return merged
+
+
+async def _generate_shards(seeded: Optional[LLMChain], unseeded: LLMChain, inputs: Dict[str, Any],
+                           columns: Sequence[str], sizes: Sequence[int], seed: int, semaphore: asyncio.Semaphore,
+                           call: ChainCall) -> List[List[Dict[str, str]]]:
+    """One call per shard size. The first shard runs ``seeded`` (if given), the others ``unseeded``."""
+    async def run(shard: int, size: int) -> List[Dict[str, str]]:
+        chain = seeded if shard == 0 and seeded is not None else unseeded
+        async with semaphore:
+            output = await call(chain, {**inputs, "row_numbers": size, "shard": shard + 1,
+                                        "shards": len(sizes), "seed": seed + shard})
+        return parse_rows(output, columns)
+
+    results = await asyncio.gather(*(run(i, size) for i, size in enumerate(sizes)),
+                                   return_exceptions=True)
+    shard_rows = [rows for rows in results if not isinstance(rows, BaseException)]
+    if not shard_rows:
+        raise RowParseError(f"All {len(sizes)} shard calls failed: {results[0]}")
+    return shard_rows
+
+
+async def agenerate_sharded(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                            total_rows: int, shard_size: int = SHARD_SIZE,
+                            max_parallel: int = MAX_PARALLEL_SHARDS,
+                            callbacks: Callbacks = None, call: Optional[ChainCall] = None) -> List[Dict[str, str]]:
+    """Generate ``total_rows`` unique rows with parallel shard calls.
+
+    Only the first shard returns the selected values as a row. Rows that
+    repeat or nearly repeat an earlier row are dropped. If that or failed
+    shards leave the result short, one more round of shards, none of them
+    seeded, is requested for the missing rows only; if that round fails too,
+    the rows of the first round are returned. ``call`` makes each shard call
+    (default: one attempt with ``callbacks``).
+    """
+    seeded, unseeded = shard_chain(rows_chain), shard_chain(rows_chain, seed_row=False)
+    semaphore = asyncio.Semaphore(max_parallel)
+    seed = random.randrange(10_000)
+    call = call or chain_call(callbacks)
+    rows = dedupe_rows(merge_rows(await _generate_shards(
+        seeded, unseeded, inputs, columns, split_rows(total_rows, shard_size), seed, semaphore, call)))
+    missing = total_rows - len(rows)
+    if missing > 0:
+        try:
+            top_up = await _generate_shards(None, unseeded, inputs, columns, split_rows(missing, shard_size),
+                                            seed + total_rows, semaphore, call)
+        except RowParseError:
+            top_up = []
+        rows = dedupe_rows(merge_rows([rows, *top_up]))
+    return rows[:total_rows]
+
+
+def generate_sharded(rows_chain: LLMChain, inputs: Dict[str, Any], columns: Sequence[str],
+                     total_rows: int, **kwargs: Any) -> List[Dict[str, str]]:
+    """Blocking wrapper around :func:`agenerate_sharded` for the Streamlit apps."""
+    return asyncio.run(agenerate_sharded(rows_chain, inputs, columns, total_rows, **kwargs))
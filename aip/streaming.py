@@ -0,0 +1,50 @@
+"""Render LLM tokens into Streamlit placeholders as they arrive."""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.chains import LLMChain
+
+from aip.retry import call_chain
+
+
+class StreamlitTokenHandler(BaseCallbackHandler):
+    """Write the partial completion into a Streamlit placeholder on every token."""
+
+    def __init__(self, container: Any, code: bool = False) -> None:
+        self.container = container
+        self.code = code
+        self.text = ""
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self.text = ""
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.text += token
+        self.render(self.text)
+
+    def render(self, text: str) -> None:
+        if self.code:
+            self.container.code(text)
+        else:
+            self.container.markdown(text)
+
+
+def stream_chain(chain: LLMChain, inputs: Dict[str, Any], container: Optional[Any] = None,
+                 code: bool = False, callbacks: Optional[Sequence[BaseCallbackHandler]] = None,
+                 retries: int = 0, on_retry: Optional[Callable[[], None]] = None) -> str:
+    """Run ``chain`` and return its output, streaming tokens into ``container``.
+
+    The chain's LLM must be built with ``streaming=True`` for tokens to arrive
+    one by one. Cached responses produce no tokens, so the full output is
+    rendered once the chain returns. With no container the chain runs as usual.
+    Extra ``callbacks`` are attached to the call in both cases. Failed calls
+    are retried ``retries`` times (see :func:`aip.retry.call_chain`); a retry
+    streams its tokens over the partial output of the failed attempt.
+    """
+    callbacks = list(callbacks or [])
+    if container is None:
+        return call_chain(chain, inputs, callbacks, retries, on_retry=on_retry)
+    handler = StreamlitTokenHandler(container, code=code)
+    output = call_chain(chain, inputs, [handler, *callbacks], retries, on_retry=on_retry)
+    handler.render(output)
+    return output
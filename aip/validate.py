@@ -0,0 +1,133 @@
+"""Check the generated table and prompt lines against the request.
+
+The table must have a column for every field that is not "none", exactly
+``row_numbers`` complete rows, and must not stop in the middle of a row.
+Every prompt line must start with the framework and end with
+``—ar {aspect_ratio}``. The checks only read the text; :mod:`aip.repair`
+makes the calls that fix what they find.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from aip.fused import EMPTY_VALUES, PROMPTS_TITLE, RowParseError, parse_table, split_lines, table_columns
+from aip.schema import Generator
+
+Row = Dict[str, str]
+
+# "—ar 16:9", also written "--ar 16:9" or "– ar 16:9" by the model
+SUFFIX_RE = re.compile(r"\s*(?:—|–|--)\s*ar\s+(\S+)\s*$")
+
+
+@dataclass
+class TableCheck:
+    rows: List[Row] = field(default_factory=list)
+    missing_columns: List[str] = field(default_factory=list)
+    missing_rows: int = 0
+    extra_rows: int = 0
+    # The output stops inside a row, usually because it ran out of tokens
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing_columns or self.missing_rows or self.extra_rows or self.truncated)
+
+    def problems(self) -> List[str]:
+        problems = []
+        if self.missing_columns:
+            problems.append(f"missing columns: {', '.join(self.missing_columns)}")
+        if self.truncated:
+            problems.append("truncated")
+        if self.missing_rows:
+            problems.append(f"{self.missing_rows} rows missing")
+        if self.extra_rows:
+            problems.append(f"{self.extra_rows} rows too many")
+        return problems
+
+
+@dataclass
+class LinesCheck:
+    # The valid prompt of each table row, or None when it is missing or cut off
+    prompts: List[Optional[str]] = field(default_factory=list)
+    # Prompts whose framework prefix or —ar suffix was fixed in place
+    fixed: int = 0
+    extra_lines: int = 0
+
+    @property
+    def missing(self) -> List[int]:
+        return [i for i, prompt in enumerate(self.prompts) if prompt is None]
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.fixed or self.extra_lines)
+
+
+def expected_columns(generator: Generator, inputs: Mapping[str, Any]) -> List[str]:
+    """The table columns of the fields that are not set to "none"."""
+    return [f.column_name for f in generator.fields if str(inputs[f.name]).strip().lower() not in EMPTY_VALUES]
+
+
+def ends_mid_row(text: str) -> bool:
+    """Whether the markdown table in ``text`` stops inside its last row."""
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    table = [line for line in lines if line.startswith("|")]
+    if not table or lines[-1] != table[-1] or len(table) < 2:
+        return False
+    return not table[-1].endswith("|") or table[-1].count("|") < table[0].count("|")
+
+
+def check_table(text: str, columns: Sequence[str], expected: Sequence[str], row_numbers: int) -> TableCheck:
+    """Check the table prompt output for ``row_numbers`` rows with the ``expected`` columns.
+
+    ``columns`` are all the generator columns. The returned rows are the
+    complete ones, at most ``row_numbers``; a row cut off by truncation and
+    rows with no values are left out.
+    """
+    truncated = ends_mid_row(text)
+    if truncated:
+        text = text.strip().rsplit("\n", 1)[0]
+    found = table_columns(text, columns)
+    try:
+        rows = parse_table(text, columns)
+    except RowParseError:
+        rows = []
+    rows = [row for row in rows if any(row[column].strip().lower() not in EMPTY_VALUES for column in expected)]
+    return TableCheck(rows=rows[:row_numbers],
+                      missing_columns=[column for column in expected if column not in found],
+                      missing_rows=max(0, row_numbers - len(rows)),
+                      extra_rows=max(0, len(rows) - row_numbers),
+                      truncated=truncated)
+
+
+def fix_prompt(prompt: str, framework: str, aspect_ratio: str) -> str:
+    """``prompt`` with the framework in front and exactly one ``—ar {aspect_ratio}`` at the end."""
+    prompt = SUFFIX_RE.sub("", prompt.strip()).rstrip(" ,.")
+    if not prompt.lower().startswith(framework.lower()):
+        prompt = f"{framework}, {prompt}"
+    return f"{prompt} —ar {aspect_ratio}"
+
+
+def check_lines(text: str, row_numbers: int, framework: str, aspect_ratio: str) -> LinesCheck:
+    """Check the line prompt output for one prompt per table row.
+
+    Prompts are matched to rows in order. A wrong or missing framework prefix
+    and a misspelled or wrong ``—ar`` suffix are fixed in place. The last
+    prompt without any suffix is taken to be cut off, like prompts for rows
+    beyond the end of the output.
+    """
+    found = split_lines(text)
+    check = LinesCheck(extra_lines=max(0, len(found) - row_numbers))
+    for i, prompt in enumerate(found[:row_numbers]):
+        if SUFFIX_RE.search(prompt) is None and i == len(found) - 1:
+            check.prompts.append(None)
+            continue
+        fixed = fix_prompt(prompt, framework, aspect_ratio)
+        check.fixed += fixed != prompt.strip()
+        check.prompts.append(fixed)
+    check.prompts += [None] * (row_numbers - len(check.prompts))
+    return check
+
+
+def render_prompts(prompts: Sequence[str]) -> str:
+    """Prompts as the titled bulleted markdown list of the line prompt."""
+    return "\n".join([f"### {PROMPTS_TITLE}", *(f"- {prompt}" for prompt in prompts)])
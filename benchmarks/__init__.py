@@ -0,0 +1 @@
+"""Benchmarks for the generation pipelines, run against a local fake OpenAI server."""
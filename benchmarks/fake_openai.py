@@ -0,0 +1,108 @@
+"""Local stand-in for the OpenAI completions endpoint.
+
+Answers ``POST /v1/completions`` with canned table, prompt-line or JSON-row
+completions after a configurable latency, streaming tokens at a configurable
+rate when asked to. Point the OpenAI LLM at it with
+``openai_api_base="http://127.0.0.1:<port>/v1"``::
+
+    python -m benchmarks.fake_openai --port 8001 --latency 0.3 --token-rate 80
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from aip.budget import count_tokens
+from aip.llms import canned_completion
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the simulated latency and token rate."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.2, token_rate: float = 0.0) -> None:
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = latency
+        self.token_rate = token_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server: FakeOpenAIServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompts = body.get("prompt", "")
+        prompt = prompts[0] if isinstance(prompts, list) else prompts
+        text = canned_completion(prompt)
+        with self.server._lock:
+            self.server.requests += 1
+        completion_tokens = count_tokens(text)
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": completion_tokens,
+                 "total_tokens": count_tokens(prompt) + completion_tokens}
+        time.sleep(self.server.latency)
+        token_delay = 1 / self.server.token_rate if self.server.token_rate > 0 else 0.0
+        model = body.get("model", "text-davinci-003")
+        if body.get("stream"):
+            self._stream(text, model, token_delay)
+            return
+        time.sleep(token_delay * completion_tokens)
+        self._send_json({"id": "cmpl-fake", "object": "text_completion", "created": int(time.time()),
+                         "model": model, "usage": usage,
+                         "choices": [{"text": text, "index": 0, "logprobs": None, "finish_reason": "stop"}]})
+
+    def _send_json(self, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, text: str, model: str, token_delay: float) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(text), 4):
+            chunk = {"id": "cmpl-fake", "object": "text_completion", "created": int(time.time()), "model": model,
+                     "choices": [{"text": text[i:i + 4], "index": 0, "logprobs": None, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="completion tokens per second (0 = instant)")
+    args = parser.parse_args()
+    server = FakeOpenAIServer((args.host, args.port), latency=args.latency, token_rate=args.token_rate)
+    print(f"Fake OpenAI API listening on {server.api_base}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Profile the import time of the app modules to catch start-up regressions.
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+reports the median total and the slowest top-level packages::
+
+    python -m benchmarks.importtime aip.app --forbid langchain --forbid openai --budget-ms 1500
+
+Exits with status 1 if a forbidden package is imported or the median import
+time is over the budget, so it can run as a CI check.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def profile_import(module: str) -> Tuple[float, Dict[str, float]]:
+    """Import ``module`` in a fresh interpreter.
+
+    Returns the total import time of ``module`` in ms and the time in ms spent
+    importing each root package (``streamlit``, ``numpy``, ...) along the way.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             capture_output=True, text=True, check=True)
+    packages: Dict[str, float] = {}
+    total = 0.0
+    for line in process.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, name = match.groups()
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0.0) + int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, packages
+
+
+def imported_modules(module: str) -> List[str]:
+    process = subprocess.run([sys.executable, "-c", f"import sys, {module}; print(*sorted(sys.modules))"],
+                             capture_output=True, text=True, check=True)
+    return process.stdout.split()
+
+
+def report(module: str, repeat: int, top: int) -> Tuple[str, float]:
+    runs = [profile_import(module) for _ in range(repeat)]
+    median = statistics.median(total for total, _ in runs)
+    slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:top]
+    lines = [f"{module}: median {median:.0f} ms over {repeat} runs"]
+    lines += [f"  {ms:8.1f} ms  {name}" for name, ms in slowest]
+    return "\n".join(lines), median
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["aip.app"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of root packages listed")
+    parser.add_argument("--budget-ms", type=float, help="fail if a median import time is higher")
+    parser.add_argument("--forbid", action="append", default=[],
+                        help="fail if importing the modules also imports this package (repeatable)")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    reports = []
+    failed = False
+    for module in args.modules:
+        text, median = report(module, args.repeat, args.top)
+        reports.append(text)
+        if args.budget_ms is not None and median > args.budget_ms:
+            reports.append(f"  FAIL: over the {args.budget_ms:.0f} ms budget")
+            failed = True
+        loaded = set(imported_modules(module))
+        for package in args.forbid:
+            if package in loaded:
+                reports.append(f"  FAIL: imports {package}")
+                failed = True
+
+    text = "\n".join(reports)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
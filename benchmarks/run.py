@@ -0,0 +1,147 @@
+"""Benchmark the two-chain, cached and batch pipelines against a fake OpenAI server.
+
+Starts :mod:`benchmarks.fake_openai` in-process and reports p50/p95/p99
+latency, throughput, tokens per request and per-stage timings::
+
+    python -m benchmarks.run --requests 20 --concurrency 8 --latency 0.2 --token-rate 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+import langchain
+
+from aip.batch import BatchRunner
+from aip.cache import SQLiteLRUCache
+from aip.chains import build_chains
+from aip.generators import GENERATORS
+from aip.metrics import MetricsHandler, RequestMetrics
+from aip.schema import Generator
+from benchmarks.fake_openai import FakeOpenAIServer
+
+
+def merge_stages(results: Sequence[RequestMetrics]) -> Dict[str, List[float]]:
+    stages: Dict[str, List[float]] = {}
+    for metrics in results:
+        for stage, timings in metrics.stages.items():
+            stages.setdefault(stage, []).extend(timings)
+    return stages
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile, ``q`` in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(name: str, latencies: Sequence[float], wall: float, tokens: int,
+              stages: Dict[str, List[float]]) -> str:
+    lines = [
+        f"{name}",
+        f"  requests     {len(latencies)}",
+        f"  latency ms   p50 {percentile(latencies, 50) * 1000:8.1f}   p95 {percentile(latencies, 95) * 1000:8.1f}"
+        f"   p99 {percentile(latencies, 99) * 1000:8.1f}",
+        f"  throughput   {len(latencies) / wall:8.2f} req/s",
+        f"  tokens/req   {tokens / max(1, len(latencies)):8.1f}",
+    ]
+    for stage, timings in sorted(stages.items()):
+        lines.append(f"  stage {stage:<6} p50 {percentile(timings, 50) * 1000:8.1f} ms   "
+                     f"p95 {percentile(timings, 95) * 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+def sample_inputs(generator: Generator, count: int, rows: int) -> List[Dict[str, Any]]:
+    """``count`` distinct input dicts cycling through each field's options."""
+    records = []
+    for i in range(count):
+        values = {field.name: field.options[i % len(field.options)] for field in generator.fields}
+        if generator.framework_options:
+            values["framework"] = generator.framework_options[i % len(generator.framework_options)]
+        records.append(generator.validate_inputs({**values, "row_numbers": rows}))
+    return records
+
+
+def bench_two_chain(chains, records: Sequence[Dict[str, Any]], name: str) -> str:
+    results = []
+    started = time.perf_counter()
+    for inputs in records:
+        handler = MetricsHandler(name, registry=None)
+        chains.seq(inputs, callbacks=[handler])
+        results.append(handler.finish())
+    return summarize(name, [metrics.elapsed for metrics in results], time.perf_counter() - started,
+                     sum(metrics.prompt_tokens + metrics.completion_tokens for metrics in results),
+                     merge_stages(results))
+
+
+def bench_batch(chains, generator: Generator, records: Sequence[Dict[str, Any]],
+                concurrency: int, fused: bool) -> str:
+    out_path = os.path.join(tempfile.mkdtemp(), "batch.jsonl")
+    runner = BatchRunner(chains, generator.columns, concurrency=concurrency, fused=fused, generator=generator)
+    started = time.perf_counter()
+    asyncio.run(runner.run(records, out_path))
+    wall = time.perf_counter() - started
+    with open(out_path, encoding="utf-8") as f:
+        results = [json.loads(line) for line in f]
+    failed = sum("error" in result for result in results)
+    name = f"batch {'fused' if fused else 'two-chain'} (concurrency {concurrency}, {failed} failed)"
+    tokens = sum(result["tokens"]["prompt"] + result["tokens"]["completion"] for result in results)
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        for stage, timings in result["stages"].items():
+            stages.setdefault(stage, []).extend(timings)
+    return summarize(name, [result["elapsed"] for result in results], wall, tokens, stages)
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generator", choices=sorted(GENERATORS), default="photo")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=5, help="row_numbers per request")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake server latency before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="fake server completion tokens per second")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(("127.0.0.1", 0), latency=args.latency, token_rate=args.token_rate).start()
+    generator = GENERATORS[args.generator]
+    records = sample_inputs(generator, args.requests, args.rows)
+    chains = build_chains("sk-fake", generator, cache=False, verbose=False,
+                          openai_api_base=server.api_base, max_retries=1)
+
+    reports = [f"fake server: latency {args.latency}s, {args.token_rate} tokens/s, {args.rows} rows per request"]
+    reports.append(bench_two_chain(chains, records, "two-chain (sequential)"))
+    original_chains = build_chains("sk-fake", generator, cache=False, compact=False,
+                                   openai_api_base=server.api_base, max_retries=1)
+    reports.append(bench_two_chain(original_chains, records, "two-chain (original prompts)"))
+
+    langchain.llm_cache = SQLiteLRUCache(os.path.join(tempfile.mkdtemp(), "cache.db"))
+    cached_chains = build_chains("sk-fake", generator, cache=True, verbose=False,
+                                 openai_api_base=server.api_base, max_retries=1)
+    bench_two_chain(cached_chains, records, "warm-up")
+    reports.append(bench_two_chain(cached_chains, records, "two-chain cached (warm)"))
+    langchain.llm_cache = None
+
+    reports.append(bench_batch(chains, generator, records, args.concurrency, fused=False))
+    reports.append(bench_batch(chains, generator, records, args.concurrency, fused=True))
+    reports.append(f"upstream requests served: {server.requests}")
+    server.shutdown()
+
+    report = "\n\n".join(reports)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import langchain
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache():
+    """Every test calls its LLM; nothing is answered by a response cache left by another test."""
+    cache = langchain.llm_cache
+    langchain.llm_cache = None
+    yield
+    langchain.llm_cache = cache
@@ -0,0 +1,60 @@
+"""LLM stand-ins for the chain tests."""
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.llms.base import LLM
+
+from aip.budget import copy_model
+from aip.chains import Chains, build_chains
+from aip.generators import PHOTO
+from aip.schema import Generator
+
+
+class ScriptedLLM(LLM):
+    """Answers every prompt with ``respond(prompt)`` and keeps the prompts it was sent."""
+
+    respond: Callable[[str], str]
+    prompts: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        self.prompts.append(prompt)
+        return self.respond(prompt)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None,
+                     **kwargs: Any) -> str:
+        return self._call(prompt)
+
+
+def scripted_chains(respond: Callable[[str], str], generator: Generator = PHOTO,
+                    compact: bool = True) -> Chains:
+    """The chains of ``generator`` with every stage answered by one :class:`ScriptedLLM`."""
+    llm = ScriptedLLM(respond=respond, prompts=[])
+    chains = build_chains(None, generator, cache=False, creative_backend="fake", formatting_backend="fake",
+                          compact=compact)
+    return Chains(*(copy_model(chain, llm=llm) if hasattr(chain, "llm") else chain for chain in chains))
+
+
+def inputs_for(generator: Generator = PHOTO, row_numbers: int = 5, **values: str) -> Dict[str, Any]:
+    """Valid inputs picking the first option of every field."""
+    inputs = {field.name: field.options[0] for field in generator.fields}
+    if generator.framework_options:
+        inputs["framework"] = generator.framework_options[0]
+    return generator.validate_inputs({**inputs, "row_numbers": row_numbers, **values})
+
+
+def make_row(generator: Generator, tag: Any) -> Dict[str, str]:
+    return {column: f"{column} {tag}" for column in generator.columns}
+
+
+def requested_rows(prompt: str) -> int:
+    """The row count a fused row prompt asks for."""
+    return int(re.search(r"(\d+) (?:variations|objects)", prompt).group(1))
+
+
+def rows_json(rows: List[Dict[str, str]]) -> str:
+    return json.dumps(rows)
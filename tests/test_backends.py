@@ -0,0 +1,36 @@
+import pytest
+
+from aip.backends import Router, parse_backend, requires_api_key
+from aip.llms import FakeLLM
+
+
+def test_parse_backend():
+    assert parse_backend("openai") == ("openai", "")
+    assert parse_backend("openai:gpt-3.5-turbo-instruct") == ("openai", "gpt-3.5-turbo-instruct")
+    assert parse_backend("llamacpp:/models/a:b.gguf") == ("llamacpp", "/models/a:b.gguf")
+    with pytest.raises(ValueError, match="needs a model path"):
+        parse_backend("llamacpp")
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        parse_backend("anthropic")
+
+
+def test_requires_api_key():
+    assert requires_api_key("fake", "openai:text-curie-001")
+    assert not requires_api_key("fake", "llamacpp:/models/llama.gguf")
+
+
+def test_router_shares_one_llm_per_backend_and_role():
+    router = Router("sk-fake", creative="openai", formatting="openai", max_retries=1)
+    assert router.llm("table") is router.llm("rows")
+    assert router.llm("line") is router.llm("polish")
+    assert router.llm("table") is not router.llm("line")
+    assert (router.llm("table").temperature, router.llm("line").temperature) == (0.7, 0.0)
+    assert router.llm("table").max_retries == 1
+
+
+def test_router_sends_formatting_to_its_own_backend():
+    router = Router("sk-fake", creative="openai:text-davinci-003", formatting="fake", max_retries=1)
+    assert router.llm("table").model_name == "text-davinci-003"
+    assert isinstance(router.llm("line"), FakeLLM)
+    with pytest.raises(ValueError):
+        Router(creative="local")
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+
+from aip.batch import BatchRunner, TokenBucket
+from aip.fused import split_lines
+from aip.generators import PHOTO
+
+from tests.helpers import inputs_for, make_row, rows_json, scripted_chains
+
+
+def test_token_bucket_bursts_then_limits():
+    async def acquire(bucket, count):
+        started = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two calls burst right away, the next two wait 1/20 s each
+    assert asyncio.run(acquire(TokenBucket(20, capacity=2), 2)) < 0.03
+    assert 0.08 <= asyncio.run(acquire(TokenBucket(20, capacity=2), 4)) < 0.5
+
+
+def test_token_bucket_rate_zero_does_not_wait():
+    async def acquire():
+        bucket = TokenBucket(0)
+        started = time.monotonic()
+        for _ in range(1000):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire()) < 0.1
+
+
+def test_fused_record_is_repaired_and_counts_its_retries():
+    calls = []
+
+    def respond(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError("rate limited")
+        return rows_json([make_row(PHOTO, len(calls) * 10 + i) for i in range(2)])
+
+    runner = BatchRunner(scripted_chains(respond), PHOTO.columns, fused=True, generator=PHOTO, backoff=0)
+    result = asyncio.run(runner.run_record(0, inputs_for(PHOTO, row_numbers=3)))
+    assert "error" not in result
+    assert len(result["rows"]) == 3 and len(split_lines(result["lines"])) == 3
+    assert result["retries"] == 1
+    assert result["repairs"] == 1
+
+
+def test_run_writes_every_record(tmp_path):
+    def respond(prompt):
+        if "Subject=Broken" in prompt:
+            raise RuntimeError("API down")
+        return rows_json([make_row(PHOTO, 0)])
+
+    records = [inputs_for(PHOTO, row_numbers=1), inputs_for(PHOTO, row_numbers=1, subject="Broken")]
+    # Built outside the event loop, as main() does
+    runner = BatchRunner(scripted_chains(respond), PHOTO.columns, fused=True, retries=0, rate=100)
+    out_path = tmp_path / "results.jsonl"
+    assert asyncio.run(runner.run(records, str(out_path))) == {"ok": 1, "failed": 1}
+    results = sorted((json.loads(line) for line in out_path.read_text().splitlines()), key=lambda r: r["index"])
+    assert [result["index"] for result in results] == [0, 1]
+    assert "error" not in results[0] and results[1]["error"] == "RuntimeError: API down"
@@ -0,0 +1,72 @@
+import pytest
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.llms import OpenAI
+from langchain.load.dump import dumpd
+
+from aip.budget import (MIN_COMPLETION_TOKENS, ContextOverflowError, compact_prompt, compact_table, completion_budget,
+                        copy_model, extend_prompt)
+from aip.chains import build_chains
+from aip.generators import PHOTO
+
+from tests.helpers import inputs_for
+
+
+def test_compact_table_drops_padding_divider_and_empty_columns():
+    table = ("| Subject | Lens | Mood |\n"
+             "|:--------|------|-----:|\n"
+             "| Dog     | None |  Calm |\n"
+             "| Cat     |      |  Wild |")
+    assert compact_table(table) == "|Subject|Mood|\n|Dog|Calm|\n|Cat|Wild|"
+
+
+def test_compact_table_leaves_other_text_alone():
+    assert compact_table("  no table here \n") == "no table here"
+
+
+def test_completion_budget_grows_with_rows_and_has_a_floor():
+    assert completion_budget("json", 1, 1) == MIN_COMPLETION_TOKENS
+    assert completion_budget("json", 20, 12) > completion_budget("json", 10, 12) > MIN_COMPLETION_TOKENS
+    assert completion_budget("lines", 10, 12) != completion_budget("table", 10, 12)
+
+
+def test_compact_prompt_leaves_out_none_fields():
+    text = compact_prompt(PHOTO, "rows").format(**inputs_for(PHOTO))
+    assert "Clothing Type" not in text and "Subject=Landscape" in text
+
+
+def test_extend_prompt_appends_a_template():
+    prompt = extend_prompt(compact_prompt(PHOTO, "rows"), "\nAvoid: {avoid}", ["avoid"])
+    assert prompt.format(**inputs_for(PHOTO), avoid="dogs").endswith("\nAvoid: dogs")
+
+
+class Handler(BaseCallbackHandler):
+    pass
+
+
+def test_copy_model_keeps_callbacks_and_serializes():
+    handler = Handler()
+    llm = OpenAI(openai_api_key="sk-test", callbacks=[handler])
+    copied = copy_model(llm, max_tokens=7)
+    assert copied.max_tokens == 7 and llm.max_tokens != 7
+    assert copied.callbacks == [handler]
+
+    chains = build_chains("sk-test", PHOTO, cache=False)
+    chain = copy_model(chains.rows, llm=copied, prompt=extend_prompt(chains.rows.prompt, "{x}", ["x"]))
+    # Chains serialize themselves, their prompt and their LLM for the callbacks of every call
+    assert dumpd(chain)["kwargs"]["llm"]
+    assert dumpd(copy_model(chain, llm=copy_model(chain.llm, temperature=0)))
+
+
+def test_budgeted_llm_sizes_max_tokens():
+    chain = build_chains("sk-test", PHOTO, cache=False).rows
+    inputs = inputs_for(PHOTO, row_numbers=5)
+    prompts, _ = chain.prep_prompts([inputs])
+    assert chain._budgeted_llm([inputs], prompts).max_tokens == completion_budget("json", 5, len(PHOTO.columns))
+
+
+def test_budgeted_llm_refuses_prompts_that_overflow_the_context():
+    chain = build_chains("sk-test", PHOTO, cache=False).rows
+    inputs = inputs_for(PHOTO, subject="dog " * 5000)
+    prompts, _ = chain.prep_prompts([inputs])
+    with pytest.raises(ContextOverflowError):
+        chain._budgeted_llm([inputs], prompts)
@@ -0,0 +1,34 @@
+import time
+
+from langchain.schema import Generation
+
+from aip.cache import SQLiteLRUCache
+
+
+def test_lookup_round_trip(tmp_path):
+    cache = SQLiteLRUCache(str(tmp_path / "cache.db"))
+    assert cache.lookup("prompt", "llm") is None
+    cache.update("prompt", "llm", [Generation(text="answer", generation_info={"finish_reason": "stop"})])
+    assert cache.lookup("prompt", "llm") == [Generation(text="answer", generation_info={"finish_reason": "stop"})]
+    assert cache.lookup("prompt", "other llm") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SQLiteLRUCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.update("a", "llm", [Generation(text="a")])
+    time.sleep(0.01)
+    cache.update("b", "llm", [Generation(text="b")])
+    time.sleep(0.01)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.lookup("a", "llm") is not None
+    time.sleep(0.01)
+    cache.update("c", "llm", [Generation(text="c")])
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") is not None and cache.lookup("c", "llm") is not None
+
+
+def test_entries_survive_a_new_connection(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteLRUCache(path).update("a", "llm", [Generation(text="a")])
+    assert SQLiteLRUCache(path).lookup("a", "llm") == [Generation(text="a")]
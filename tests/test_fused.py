@@ -0,0 +1,52 @@
+import pytest
+
+from aip.fused import (RowParseError, format_line, parse_rows, parse_table, render_lines, render_table, split_lines,
+                       table_columns)
+
+COLUMNS = ["Subject", "Camera Angle", "Mood"]
+
+
+def test_parse_rows_matches_keys_loosely():
+    text = 'Sure!\n[{"subject": "Dog", "camera_angle": "Low", "MOOD ": "Calm", "extra": "x"}, "junk"]\nDone.'
+    assert parse_rows(text, COLUMNS) == [{"Subject": "Dog", "Camera Angle": "Low", "Mood": "Calm"}]
+
+
+def test_parse_rows_fills_missing_keys():
+    assert parse_rows('[{"Subject": "Dog", "Mood": null}]', COLUMNS) == [
+        {"Subject": "Dog", "Camera Angle": "", "Mood": ""}]
+
+
+@pytest.mark.parametrize("text", ["no json here", "[{'Subject': 'Dog'}]", "[1, 2]", "[]"])
+def test_parse_rows_rejects_bad_output(text):
+    with pytest.raises(RowParseError):
+        parse_rows(text, COLUMNS)
+
+
+def test_table_round_trip():
+    rows = [{"Subject": "Dog", "Camera Angle": "Low", "Mood": "Calm"},
+            {"Subject": "Cat", "Camera Angle": "", "Mood": "Energetic"}]
+    table = render_table(rows, COLUMNS)
+    assert parse_table(table, COLUMNS) == rows
+    assert table_columns(table, COLUMNS) == COLUMNS
+
+
+def test_parse_table_ignores_text_around_the_table():
+    text = "Here is the table:\n\n| subject | mood |\n|:---|---:|\n| Dog | Calm |\n\nEnjoy!"
+    assert parse_table(text, COLUMNS) == [{"Subject": "Dog", "Camera Angle": "", "Mood": "Calm"}]
+    assert table_columns(text, COLUMNS) == ["Subject", "Mood"]
+
+
+def test_parse_table_rejects_unknown_headers():
+    with pytest.raises(RowParseError):
+        parse_table("| A | B |\n|---|---|\n| 1 | 2 |", COLUMNS)
+
+
+def test_split_lines_strips_bullets_and_numbers():
+    text = "### Title\n- one\n* two\n3. three\n4) four\nnot a prompt"
+    assert split_lines(text) == ["one", "two", "three", "four"]
+
+
+def test_format_line_skips_empty_values():
+    row = {"Subject": "Dog", "Camera Angle": "None", "Mood": "Calm"}
+    assert format_line(row, "Photograph", "16:9") == "Photograph, Dog, Calm —ar 16:9"
+    assert split_lines(render_lines([row], "Photograph", "16:9")) == ["Photograph, Dog, Calm —ar 16:9"]
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+
+import pytest
+
+from aip.generators import PHOTO
+from aip.history import ResultStore, backend_label, export_runs, main, parse_where
+from aip.metrics import RequestMetrics
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def record(store, subject, mode="Fused (single call)", generator="photo"):
+    return store.record(generator, mode, {"subject": subject, "row_numbers": 2}, f"- {subject} 1\n- {subject} 2",
+                        rows=[{"Subject": subject}], metrics=RequestMetrics(mode=mode, elapsed=1.5),
+                        model="openai:text-davinci-003")
+
+
+def test_runs_are_found_by_value(store):
+    first = record(store, "Portrait")
+    record(store, "Landscape", mode="Classic (two calls)")
+    latest = record(store, "Portrait")
+    assert [run["id"] for run in store.query("photo", where={"subject": "portrait"})] == [latest, first]
+    assert [run["id"] for run in store.query(mode="Classic (two calls)")] == [first + 1]
+    assert store.query("general") == []
+    run = store.get(first)
+    assert run["inputs"] == {"subject": "Portrait", "row_numbers": 2}
+    assert run["rows"] == [{"Subject": "Portrait"}] and run["elapsed"] == 1.5
+    assert store.count() == 3
+
+
+def test_values_are_counted_per_generator(store):
+    record(store, "Portrait")
+    record(store, "Portrait")
+    record(store, "Landscape")
+    record(store, "Robot", generator="general")
+    assert store.values("subject", "photo") == [("Portrait", 2), ("Landscape", 1)]
+    assert ("2", 4) in store.values("row_numbers")
+
+
+def test_csv_export_has_a_column_per_input(store):
+    record(store, "Portrait")
+    store.record("photo", "Offline (no API call)", {"subject": "Dog", "lens": "50mm"}, "- Dog")
+    rows = list(csv.DictReader(io.StringIO(export_runs(store.query(), "csv"))))
+    assert [row["subject"] for row in rows] == ["Dog", "Portrait"]
+    assert rows[0]["lens"] == "50mm" and rows[1]["lens"] == ""
+    assert rows[0]["elapsed"] == "" and rows[1]["elapsed"] == "1.5"
+    assert rows[1]["prompts"] == "- Portrait 1\n- Portrait 2"
+    jsonl = export_runs(store.query(), "jsonl").splitlines()
+    assert [json.loads(line)["inputs"]["subject"] for line in jsonl] == ["Dog", "Portrait"]
+    with pytest.raises(ValueError):
+        export_runs([], "xml")
+
+
+def test_where_conditions_are_checked():
+    assert parse_where(["subject=Dog", "lens=a=b"], PHOTO) == {"subject": "Dog", "lens": "a=b"}
+    with pytest.raises(ValueError):
+        parse_where(["subject"])
+    with pytest.raises(ValueError):
+        parse_where(["colour=red"], PHOTO)
+
+
+def test_backend_label():
+    assert backend_label("openai", "openai:text-davinci-003") == "openai:text-davinci-003"
+    assert backend_label("llamacpp:/models/llama.gguf", "fake") == "llamacpp:llama.gguf + fake"
+
+
+def test_export_command(store, tmp_path):
+    record(store, "Portrait")
+    out = tmp_path / "photo.csv"
+    assert main(["export", "--database", store.database_path, "--format", "csv", "-o", str(out)]) == 0
+    assert "Portrait" in out.read_text()
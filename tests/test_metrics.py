@@ -0,0 +1,65 @@
+from uuid import uuid4
+
+import langchain
+from langchain.cache import InMemoryCache
+from langchain.schema import Generation, LLMResult
+
+from aip.budget import count_tokens
+from aip.chains import build_chains
+from aip.generators import PHOTO
+from aip.metrics import STAGE_BUCKETS, MetricsHandler, MetricsRegistry
+
+from tests.helpers import inputs_for
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for seconds in (0.05, 0.07, 0.3, 1.0, 100.0):
+        registry.observe_stage("table", seconds)
+    lines = registry.render().splitlines()
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines
+               if line.startswith('aip_stage_seconds_bucket{stage="table"')]
+    assert len(buckets) == len(STAGE_BUCKETS) + 1
+    assert buckets[:5] == [1, 2, 2, 3, 4] and buckets[-1] == 5
+    assert 'aip_stage_seconds_count{stage="table"} 5' in lines
+    assert 'aip_stage_seconds_sum{stage="table"} 101.420000' in lines
+
+
+def test_counters_render_with_labels():
+    registry = MetricsRegistry()
+    registry.inc("aip_tokens_total", 3, kind="prompt")
+    registry.inc("aip_tokens_total", 2, kind="prompt")
+    assert 'aip_tokens_total{kind="prompt"} 5' in registry.render()
+
+
+def test_reported_usage_is_used():
+    handler = MetricsHandler("test", registry=None)
+    run_id = uuid4()
+    handler.on_llm_start({}, ["a long prompt " * 10], run_id=run_id)
+    handler.on_llm_end(LLMResult(generations=[[Generation(text="answer")]],
+                                 llm_output={"token_usage": {"prompt_tokens": 3, "completion_tokens": 4}}),
+                       run_id=run_id)
+    metrics = handler.finish()
+    assert (metrics.llm_calls, metrics.prompt_tokens, metrics.completion_tokens) == (1, 3, 4)
+
+
+def test_streamed_tokens_are_counted_locally():
+    handler = MetricsHandler("test", registry=None)
+    run_id = uuid4()
+    prompt, answer = "Describe a dog on the beach.", "A golden retriever running through the surf."
+    handler.on_llm_start({}, [prompt], run_id=run_id)
+    handler.on_llm_end(LLMResult(generations=[[Generation(text=answer)]], llm_output={"token_usage": {}}),
+                       run_id=run_id)
+    metrics = handler.finish()
+    assert metrics.prompt_tokens == count_tokens(prompt) > 0
+    assert metrics.completion_tokens == count_tokens(answer) > 0
+
+
+def test_chain_stages_and_cache_hits_are_recorded():
+    langchain.llm_cache = InMemoryCache()
+    rows = build_chains(None, PHOTO, cache=True, creative_backend="fake", formatting_backend="fake").rows
+    for expected_hits in (0, 1):
+        handler = MetricsHandler("test", registry=None)
+        rows(inputs_for(PHOTO), callbacks=[handler])
+        metrics = handler.finish()
+        assert list(metrics.stages) == ["rows"] and metrics.cache_hits == expected_hits
@@ -0,0 +1,42 @@
+from aip.fused import render_lines, split_lines
+from aip.generators import PHOTO
+from aip.offline import enumerate_rows, polish_lines, sample_rows
+
+from tests.helpers import inputs_for
+
+VARY = ["subject", "lens", "lighting"]
+
+
+def test_sampled_rows_start_with_the_selection_and_repeat_for_a_seed():
+    inputs = inputs_for(PHOTO)
+    rows = sample_rows(PHOTO, inputs, VARY, 20, seed=3)
+    assert len(rows) == 20 and len({tuple(row.values()) for row in rows}) == 20
+    assert rows[0]["Subject"] == inputs["subject"]
+    assert sample_rows(PHOTO, inputs, VARY, 20, seed=3) == rows
+
+
+def test_enumerated_rows_vary_only_the_chosen_fields():
+    rows = enumerate_rows(PHOTO, inputs_for(PHOTO), ["subject"], 100)
+    assert len(rows) == len(PHOTO.fields[0].options)
+    assert len({row["Lens"] for row in rows}) == 1
+
+
+def test_polish_runs_in_chunks_and_keeps_chunks_it_can_not_use():
+    rows = sample_rows(PHOTO, inputs_for(PHOTO), VARY, 45)
+    lines = render_lines(rows, "Photo", "16:9")
+    counts = []
+
+    def polish(text, count):
+        counts.append(count)
+        prompts = split_lines(text)
+        if len(counts) == 2:
+            prompts = prompts[:-1]
+        return "\n".join(f"- polished {prompt}" for prompt in prompts)
+
+    polished, unpolished = polish_lines(lines, polish, chunk_size=20)
+    assert counts == [20, 20, 5]
+    assert unpolished == 20
+    prompts = split_lines(polished)
+    assert len(prompts) == 45
+    assert all(prompt.startswith("polished") for prompt in prompts[:20] + prompts[40:])
+    assert prompts[20:40] == split_lines(lines)[20:40]
@@ -0,0 +1,20 @@
+import asyncio
+
+from aip.generators import PHOTO
+from aip.regenerate import aregenerate_rows
+
+from tests.helpers import inputs_for, make_row, scripted_chains
+from tests.test_shards import SELECTION, literal_rows
+
+
+def test_regeneration_is_chunked_and_bounded():
+    rows = [make_row(PHOTO, f"old {i}") for i in range(200)]
+    chains = scripted_chains(literal_rows())
+    updated = asyncio.run(aregenerate_rows(chains.rows, inputs_for(PHOTO), PHOTO.columns, rows, list(range(1, 200))))
+    prompts = chains.rows.llm.prompts
+    assert len(prompts) == 40
+    assert max(len(prompt) for prompt in prompts) < 8000
+    assert updated[0] is rows[0]
+    assert all(new is not old for new, old in zip(updated[1:], rows[1:]))
+    assert len({tuple(row.values()) for row in updated}) == 200
+    assert SELECTION not in [row["Subject"] for row in updated]
@@ -0,0 +1,122 @@
+import asyncio
+
+from aip.fused import parse_table, render_table, split_lines
+from aip.generators import PHOTO
+from aip.repair import arepair_lines, arepair_rows, arepair_table
+from aip.validate import check_table, expected_columns, render_prompts
+
+from tests.helpers import inputs_for, make_row, requested_rows, rows_json, scripted_chains
+
+INPUTS = inputs_for(PHOTO, row_numbers=4)
+COLUMNS = expected_columns(PHOTO, INPUTS)
+ROWS = [{column: (f"{column} {i}" if column in COLUMNS else "") for column in PHOTO.columns} for i in range(6)]
+
+
+def table(rows):
+    return render_table(rows, COLUMNS)
+
+
+def test_valid_table_makes_no_call():
+    chains = scripted_chains(lambda prompt: "unexpected")
+    text = table(ROWS[:4])
+    assert asyncio.run(arepair_table(chains, PHOTO, INPUTS, text)) == (text, [])
+    assert chains.table.llm.prompts == []
+
+
+def test_truncated_table_is_continued_and_topped_up():
+    cut = table(ROWS[:2]) + "\n| Subject 2 | Film"
+    continuation = " Type 2 | " + " | ".join(f"{column} 2" for column in COLUMNS[2:]) + " |"
+
+    def respond(prompt):
+        if prompt.rstrip().endswith("| Film"):
+            return continuation
+        assert "These rows already exist" in prompt and requested_rows(prompt) == 1
+        return rows_json([ROWS[0], ROWS[3]])
+
+    chains = scripted_chains(respond)
+    repaired, repairs = asyncio.run(arepair_table(chains, PHOTO, INPUTS, cut))
+    assert repairs == ["table continued", "1 of 1 missing rows fetched"]
+    assert check_table(repaired, PHOTO.columns, COLUMNS, 4).ok
+    assert [row["Subject"] for row in parse_table(repaired, PHOTO.columns)] == [
+        "Subject 0", "Subject 1", "Subject 2", "Subject 3"]
+
+
+def test_table_with_missing_columns_is_generated_again():
+    chains = scripted_chains(lambda prompt: table(ROWS[:4]))
+    repaired, repairs = asyncio.run(arepair_table(chains, PHOTO, INPUTS, render_table(ROWS[:4], ["Subject"])))
+    assert repairs == ["table regenerated"]
+    assert len(chains.table.llm.prompts) == 1
+
+
+def test_only_missing_prompts_are_requested():
+    rows = ROWS[:4]
+    lines = render_prompts(["Film photography photograph, a —ar 16:9", "b —ar 16:9"])
+
+    def respond(prompt):
+        return render_prompts([f"Film photography photograph, redone {i} —ar 16:9" for i in range(2)])
+
+    chains = scripted_chains(respond)
+    repaired, repairs = asyncio.run(arepair_lines(chains, PHOTO, INPUTS, rows, lines))
+    assert split_lines(repaired) == ["Film photography photograph, a —ar 16:9",
+                                     "Film photography photograph, b —ar 16:9",
+                                     "Film photography photograph, redone 0 —ar 16:9",
+                                     "Film photography photograph, redone 1 —ar 16:9"]
+    assert repairs == ["1 prompts reformatted", "2 missing prompts written"]
+    # The repair prompt holds the two rows without a prompt, not the whole table
+    [prompt] = chains.line.llm.prompts
+    assert "Subject 2" in prompt and "Subject 3" in prompt and "Subject 0" not in prompt
+
+
+def test_prompts_the_repair_call_misses_are_formatted_locally():
+    chains = scripted_chains(lambda prompt: "nothing useful")
+    repaired, _ = asyncio.run(arepair_lines(chains, PHOTO, INPUTS, ROWS[:2], render_prompts([])))
+    assert len(split_lines(repaired)) == 2
+    assert all(line.endswith("—ar 16:9") for line in split_lines(repaired))
+
+
+def test_fused_rows_are_cut_or_filled():
+    rows = [make_row(PHOTO, i) for i in range(6)]
+    chains = scripted_chains(lambda prompt: rows_json([rows[0], *rows[3:5]]))
+    assert asyncio.run(arepair_rows(chains.rows, INPUTS, PHOTO.columns, rows)) == (rows[:4], ["2 extra rows dropped"])
+    filled, repairs = asyncio.run(arepair_rows(chains.rows, INPUTS, PHOTO.columns, rows[:2]))
+    assert filled == [rows[0], rows[1], rows[3], rows[4]]
+    assert repairs == ["2 of 2 missing rows fetched"]
+
+
+def test_repair_calls_go_through_the_call_hook():
+    calls = []
+
+    async def call(chain, inputs):
+        calls.append(chain.output_key)
+        return (await chain.acall(inputs))[chain.output_key]
+
+    chains = scripted_chains(lambda prompt: rows_json([make_row(PHOTO, 9)]))
+    asyncio.run(arepair_rows(chains.rows, INPUTS, PHOTO.columns, [make_row(PHOTO, 0)] * 3, call=call))
+    assert calls == ["rows"]
+
+
+def failing(prompt):
+    raise RuntimeError("API down")
+
+
+def test_failed_row_call_keeps_the_rows_in_hand():
+    rows = [make_row(PHOTO, i) for i in range(3)]
+    chains = scripted_chains(failing)
+    assert asyncio.run(arepair_rows(chains.rows, INPUTS, PHOTO.columns, rows)) == (
+        rows, ["1 missing rows could not be fetched"])
+
+
+def test_failed_table_calls_keep_the_original_table():
+    chains = scripted_chains(failing)
+    text = render_table(ROWS[:4], ["Subject"])
+    assert asyncio.run(arepair_table(chains, PHOTO, INPUTS, text)) == (text, ["table could not be regenerated"])
+    repaired, repairs = asyncio.run(arepair_table(chains, PHOTO, INPUTS, table(ROWS[:2]) + "\n| Subject 2 | Film"))
+    assert repairs == ["table could not be continued", "2 missing rows could not be fetched"]
+    assert parse_table(repaired, PHOTO.columns) == parse_table(table(ROWS[:2]), PHOTO.columns)
+
+
+def test_failed_line_call_formats_the_prompts_locally():
+    chains = scripted_chains(failing)
+    repaired, repairs = asyncio.run(arepair_lines(chains, PHOTO, INPUTS, ROWS[:2], render_prompts([])))
+    assert repairs == ["2 missing prompts formatted locally"]
+    assert len(split_lines(repaired)) == 2
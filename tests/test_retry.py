@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from aip.budget import ContextOverflowError
+from aip.generators import PHOTO
+from aip.metrics import MetricsHandler
+from aip.retry import acall_chain, call_chain
+from aip.streaming import stream_chain
+
+from tests.helpers import inputs_for, make_row, rows_json, scripted_chains
+
+
+def flaky(failures, error=RuntimeError):
+    """Respond with one row after raising ``failures`` times."""
+    remaining = [failures]
+
+    def respond(prompt):
+        if remaining[0]:
+            remaining[0] -= 1
+            raise error("rate limited")
+        return rows_json([make_row(PHOTO, 0)])
+    return respond
+
+
+def test_retries_are_counted():
+    chains = scripted_chains(flaky(2))
+    handler = MetricsHandler("test")
+    output = asyncio.run(acall_chain(chains.rows, inputs_for(PHOTO), [handler], retries=3, backoff=0,
+                                     on_retry=handler.record_retry))
+    assert output == rows_json([make_row(PHOTO, 0)])
+    assert handler.finish().retries == 2
+    assert len(chains.rows.llm.prompts) == 3
+
+
+def test_last_failure_is_raised():
+    chains = scripted_chains(flaky(3))
+    with pytest.raises(RuntimeError):
+        call_chain(chains.rows, inputs_for(PHOTO), retries=2, backoff=0)
+    assert len(chains.rows.llm.prompts) == 3
+
+
+def test_context_overflow_is_not_retried():
+    chains = scripted_chains(flaky(1, ContextOverflowError))
+    retries = []
+    with pytest.raises(ContextOverflowError):
+        call_chain(chains.rows, inputs_for(PHOTO), retries=3, backoff=0, on_retry=lambda: retries.append(1))
+    assert retries == []
+
+
+def test_streamed_calls_retry():
+    chains = scripted_chains(flaky(1))
+    handler = MetricsHandler("test")
+    stream_chain(chains.rows, inputs_for(PHOTO), callbacks=[handler], retries=1, on_retry=handler.record_retry)
+    assert handler.finish().retries == 1
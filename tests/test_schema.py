@@ -0,0 +1,22 @@
+import pytest
+
+from aip.generators import GENERAL, PHOTO
+
+from tests.helpers import inputs_for
+
+
+def test_defaults_fill_blank_values():
+    inputs = inputs_for(PHOTO, aspect_ratio="", row_numbers=None)
+    assert inputs["aspect_ratio"] == "16:9" and inputs["row_numbers"] == 5
+    assert inputs["framework"] == PHOTO.framework
+
+
+@pytest.mark.parametrize("value", ["", "  "])
+def test_blank_field_is_rejected(value):
+    with pytest.raises(ValueError, match="Missing input values: subject"):
+        inputs_for(PHOTO, subject=value)
+
+
+def test_blank_framework_is_rejected_without_a_fixed_framework():
+    with pytest.raises(ValueError, match="Missing input values: framework"):
+        inputs_for(GENERAL, framework="")
@@ -0,0 +1,65 @@
+import itertools
+
+import pytest
+
+from aip.fused import parse_table, render_table
+from aip.generators import GENERAL, GENERATORS, PHOTO
+from aip.semantic import SemanticCache, cache_inputs, dedupe_rows, dedupe_table, normalize_text
+
+from tests.helpers import inputs_for, make_row
+
+
+def test_normalize_text():
+    assert normalize_text("  A Dog, on the Beach! ") == "dog beach"
+    assert normalize_text("The") == "the"
+    assert normalize_text("") == "none"
+
+
+@pytest.mark.parametrize("generator", GENERATORS.values(), ids=list(GENERATORS))
+def test_distinct_options_never_match(generator):
+    inputs = inputs_for(generator)
+    for field in generator.fields:
+        for stored, asked in itertools.combinations(field.options, 2):
+            cache = SemanticCache()
+            cache.update(*cache_inputs(generator, "fused", {**inputs, field.name: stored}), "stored")
+            assert cache.lookup(*cache_inputs(generator, "fused", {**inputs, field.name: asked})) is None
+
+
+def test_reworded_custom_value_matches():
+    cache = SemanticCache()
+    cache.update(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO, subject="A golden retriever on the beach")), "dog")
+    reworded = inputs_for(PHOTO, subject="golden retriever, beach")
+    similarity, result = cache.lookup(*cache_inputs(PHOTO, "fused", reworded))
+    assert result == "dog" and similarity > 0.96
+    assert cache.lookup(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO, subject="A cat on the beach"))) is None
+
+
+def test_other_exact_inputs_do_not_match():
+    cache = SemanticCache()
+    cache.update(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO)), "five")
+    assert cache.lookup(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO))) == (1.0, "five")
+    assert cache.lookup(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO, row_numbers=6))) is None
+    assert cache.lookup(*cache_inputs(PHOTO, "classic", inputs_for(PHOTO))) is None
+
+
+def test_cache_drops_the_oldest_entries():
+    cache = SemanticCache(max_entries=2)
+    for subject in ("red vintage car", "blue bicycle", "green tram"):
+        cache.update(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO, subject=subject)), subject)
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(*cache_inputs(PHOTO, "fused", inputs_for(PHOTO, subject="red vintage car"))) is None
+
+
+def test_dedupe_keeps_rows_that_change_one_value():
+    row = make_row(GENERAL, 1)
+    rows = [{**row, "Mood": "Calm"}, {**row, "Mood": "Energetic"},
+            {**row, "Mood": "Calm"}, {**row, "Mood": "calm."}]
+    assert [r["Mood"] for r in dedupe_rows(rows)] == ["Calm", "Energetic"]
+
+
+def test_dedupe_table_rewrites_only_tables_with_duplicates():
+    rows = [make_row(PHOTO, 1), make_row(PHOTO, 2)]
+    table = render_table(rows, PHOTO.columns)
+    assert dedupe_table(table, PHOTO.columns) == table
+    deduped = dedupe_table(render_table(rows + rows[:1], PHOTO.columns), PHOTO.columns)
+    assert parse_table(deduped, PHOTO.columns) == rows
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from aip.server import Coalescer
+
+
+def test_identical_calls_share_one_upstream_call():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        coalescer = Coalescer()
+        results = await asyncio.gather(*(coalescer.run("key", call) for _ in range(5)),
+                                       coalescer.run("other", call))
+        return results, len(coalescer)
+
+    results, inflight = asyncio.run(main())
+    assert len(calls) == 2 and inflight == 0
+    assert [coalesced for _, coalesced in results] == [False, True, True, True, True, False]
+    assert {result for result, _ in results} == {"result"}
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream")
+
+    async def main():
+        coalescer = Coalescer()
+        results = await asyncio.gather(coalescer.run("key", fail), coalescer.run("key", fail),
+                                       return_exceptions=True)
+        return results, len(coalescer)
+
+    results, inflight = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert inflight == 0
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        coalescer = Coalescer()
+        first = asyncio.ensure_future(coalescer.run("key", slow))
+        second = asyncio.ensure_future(coalescer.run("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("done", True)
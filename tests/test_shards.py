@@ -0,0 +1,53 @@
+import asyncio
+import itertools
+
+import pytest
+
+from aip.generators import PHOTO
+from aip.shards import agenerate_sharded, split_rows
+
+from tests.helpers import inputs_for, make_row, requested_rows, rows_json, scripted_chains
+
+SELECTION = "Landscape"
+
+
+def literal_rows():
+    """A model that returns the selection when asked for it, then new rows."""
+    counter = itertools.count()
+
+    def respond(prompt):
+        count = requested_rows(prompt)
+        rows = []
+        if "Variation 1:" in prompt or "first variation:" in prompt and "Do not include that variation" not in prompt:
+            rows.append({**make_row(PHOTO, "selection"), "Subject": SELECTION})
+            count -= 1
+        return rows_json(rows + [make_row(PHOTO, next(counter)) for _ in range(count)])
+    return respond
+
+
+def test_split_rows():
+    assert split_rows(12, 5) == [5, 5, 2]
+    assert split_rows(10, 5) == [5, 5]
+
+
+@pytest.mark.parametrize("compact", [True, False])
+@pytest.mark.parametrize("total", [20, 50, 200])
+def test_sharded_rows_are_exact_and_hold_the_selection_once(total, compact):
+    chains = scripted_chains(literal_rows(), compact=compact)
+    rows = asyncio.run(agenerate_sharded(chains.rows, inputs_for(PHOTO), PHOTO.columns, total))
+    assert len(rows) == total
+    assert [row["Subject"] for row in rows].count(SELECTION) == 1
+
+
+
+def test_failed_top_up_keeps_the_first_round():
+    calls = itertools.count()
+
+    def respond(prompt):
+        if next(calls) == 0:
+            return rows_json([make_row(PHOTO, i) for i in range(3)])
+        raise RuntimeError("API down")
+
+    chains = scripted_chains(respond)
+    rows = asyncio.run(agenerate_sharded(chains.rows, inputs_for(PHOTO), PHOTO.columns, 5))
+    assert rows == [make_row(PHOTO, i) for i in range(3)]
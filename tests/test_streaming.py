@@ -0,0 +1,59 @@
+import langchain
+from langchain.cache import InMemoryCache
+
+from aip.chains import build_chains
+from aip.generators import PHOTO
+from aip.streaming import StreamlitTokenHandler, stream_chain
+
+from tests.helpers import inputs_for
+
+
+class Placeholder:
+    """Records what a Streamlit placeholder was asked to show."""
+
+    def __init__(self):
+        self.shown = []
+
+    def markdown(self, text):
+        self.shown.append(("markdown", text))
+
+    def code(self, text):
+        self.shown.append(("code", text))
+
+
+def fake_chains(cache=False):
+    return build_chains(None, PHOTO, cache=cache, streaming=True, creative_backend="fake",
+                        formatting_backend="fake")
+
+
+def test_tokens_are_rendered_as_they_arrive():
+    placeholder = Placeholder()
+    output = stream_chain(fake_chains().table, inputs_for(PHOTO), placeholder)
+    texts = [text for kind, text in placeholder.shown]
+    assert len(texts) > 10
+    assert all(output.startswith(text) for text in texts)
+    assert texts[-1] == output
+    assert {kind for kind, _ in placeholder.shown} == {"markdown"}
+
+
+def test_cached_output_is_rendered_once_as_code():
+    langchain.llm_cache = InMemoryCache()
+    chain = fake_chains(cache=True).rows
+    stream_chain(chain, inputs_for(PHOTO), Placeholder())
+    placeholder = Placeholder()
+    output = stream_chain(chain, inputs_for(PHOTO), placeholder, code=True)
+    assert placeholder.shown == [("code", output)]
+
+
+def test_without_a_container_the_chain_runs_as_usual():
+    chain = fake_chains().rows
+    assert stream_chain(chain, inputs_for(PHOTO)) == chain(inputs_for(PHOTO))[chain.output_key]
+
+
+def test_handler_starts_over_on_every_llm_call():
+    placeholder = Placeholder()
+    handler = StreamlitTokenHandler(placeholder)
+    handler.on_llm_new_token("partial")
+    handler.on_llm_start({}, ["prompt"])
+    handler.on_llm_new_token("new")
+    assert placeholder.shown[-1] == ("markdown", "new")
@@ -0,0 +1,63 @@
+from aip.fused import render_table
+from aip.generators import PHOTO
+from aip.validate import check_lines, check_table, ends_mid_row, expected_columns, fix_prompt, render_prompts
+
+from tests.helpers import inputs_for, make_row
+
+COLUMNS = ["Subject", "Mood"]
+
+
+def table(count, columns=COLUMNS):
+    return render_table([{column: f"{column} {i}" for column in columns} for i in range(count)], columns)
+
+
+def test_complete_table_is_ok():
+    check = check_table(table(3), COLUMNS, COLUMNS, 3)
+    assert check.ok
+    assert len(check.rows) == 3
+
+
+def test_truncated_table_drops_the_cut_off_row():
+    text = table(3) + "\n| Subject 3 | Mo"
+    assert ends_mid_row(text)
+    check = check_table(text, COLUMNS, COLUMNS, 4)
+    assert check.truncated and check.missing_rows == 1
+    assert [row["Subject"] for row in check.rows] == ["Subject 0", "Subject 1", "Subject 2"]
+    assert check.problems() == ["truncated", "1 rows missing"]
+
+
+def test_extra_rows_and_missing_columns():
+    check = check_table(table(4, ["Subject"]), COLUMNS, COLUMNS, 3)
+    assert check.missing_columns == ["Mood"]
+    assert check.extra_rows == 1 and len(check.rows) == 3
+
+
+def test_rows_without_values_do_not_count():
+    text = table(2) + "\n| none | |"
+    assert check_table(text, COLUMNS, COLUMNS, 3).missing_rows == 1
+
+
+def test_expected_columns_leave_out_none_fields():
+    inputs = inputs_for(PHOTO)
+    assert "Clothing Type" not in expected_columns(PHOTO, inputs)
+    assert "Clothing Type" in expected_columns(PHOTO, {**inputs, "clothing_type": "Dress"})
+
+
+def test_fix_prompt_sets_prefix_and_one_suffix():
+    assert fix_prompt("a dog -- ar 4:3.", "Photo", "16:9") == "Photo, a dog —ar 16:9"
+    assert fix_prompt("Photo, a dog —ar 16:9", "Photo", "16:9") == "Photo, a dog —ar 16:9"
+
+
+def test_check_lines_fixes_and_finds_missing_prompts():
+    text = render_prompts(["Photo, a —ar 16:9", "b --ar 16:9", "Photo, c cut off"])
+    check = check_lines(text, 4, "Photo", "16:9")
+    assert check.prompts == ["Photo, a —ar 16:9", "Photo, b —ar 16:9", None, None]
+    assert check.fixed == 1 and check.missing == [2, 3]
+    assert not check.ok
+
+
+def test_check_lines_counts_extra_prompts():
+    rows = [make_row(PHOTO, i) for i in range(3)]
+    text = render_prompts([f"Photo, {row['Subject']} —ar 1:1" for row in rows])
+    check = check_lines(text, 2, "Photo", "1:1")
+    assert check.extra_lines == 1 and check.missing == []